@@ -3,22 +3,50 @@ import json
 import csv
 import uuid
 import re
-from datetime import datetime, timedelta
+import threading
+import time
+import atexit
+import tempfile
+import mmap
+import struct
+import bisect
+import itertools
+import hashlib
+import math
+import gzip
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from types import MappingProxyType
+from html import escape
 from werkzeug.utils import secure_filename
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_from_directory
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_from_directory, abort
 from flask_bcrypt import Bcrypt
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib
-matplotlib.use('Agg')
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.ticker import FuncFormatter
 from PIL import Image
 import io
 import base64
 from google import genai
+from dotenv import load_dotenv
 import os as os_env
 from os import path as os_path
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+try:
+    import brotli
+except ImportError:  # Optional: gzip is always available
+    brotli = None
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'iot-verse-secret-key-2024-mintfire'
@@ -26,6 +54,14 @@ app.config['UPLOAD_FOLDER'] = 'uploads/product_images'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 app.config['ALLOWED_EXTENSIONS'] = {'png', 'jpg', 'jpeg', 'gif'}
 
+# Storage backend for products and price history: 'json' (default) or 'sqlite'
+load_dotenv()
+app.config['STORAGE_BACKEND'] = os.getenv('STORAGE_BACKEND', 'json').strip().lower()
+app.config['SQLITE_PATH'] = os.getenv('SQLITE_PATH', 'data/iotverse.db')
+
+# Scheduled maintenance (daily price snapshot etc.) runs on a background thread; set BACKGROUND_JOBS=0 to use cron instead
+app.config['BACKGROUND_JOBS'] = os.getenv('BACKGROUND_JOBS', '1').strip() != '0'
+
 # Session configuration for automatic timeout
 app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(minutes=30)  # 30 minutes
 app.config['SESSION_REFRESH_EACH_REQUEST'] = True  # Refresh session on each request
@@ -52,6 +88,7 @@ def before_request():
     from flask import session
     session.permanent = True
     app.permanent_session_lifetime = timedelta(minutes=30)
+    start_background_jobs()
 
 # Handle session timeout
 @login_manager.unauthorized_handler
@@ -64,16 +101,7 @@ def unauthorized():
 @app.context_processor
 def inject_config():
     """Make safe config available to all templates (exclude sensitive data)"""
-    config = load_volta_config()
-    # Only expose non-sensitive config data
-    safe_config = {
-        'version': config.get('version', '2.0.0'),
-        'ascii_art_enabled': config.get('ascii_art_enabled', False),
-        'ascii_art': config.get('ascii_art', ''),
-        'ascii_art_light_color': config.get('ascii_art_light_color', '#ff2600'),
-        'ascii_art_dark_color': config.get('ascii_art_dark_color', '#4f9ff0'),
-    }
-    return {'config': safe_config}
+    return {'config': get_volta_config().public}
 
 # Context processor for currency data
 @app.context_processor
@@ -81,7 +109,8 @@ def inject_currencies():
     """Make currencies and symbols available to all templates"""
     return {
         'currencies': list(EXCHANGE_RATES.keys()),
-        'symbols': CURRENCY_SYMBOLS
+        'symbols': CURRENCY_SYMBOLS,
+        'currency_rates_url': url_for('currency_rates', v=CURRENCY_RATES_VERSION)
     }
 
 # User class for admin
@@ -92,15 +121,17 @@ class AdminUser(UserMixin):
 
 @login_manager.user_loader
 def load_user(user_id):
-    admin_data = load_admin_data()
+    admin_data = get_admin_data()
     if admin_data.get('email') == user_id:
         return AdminUser(user_id, user_id)
     return None
 
 # Helper functions
-def load_admin_data():
+ADMIN_FILE = 'data/admin_password.json'
+
+def _read_admin_data():
     try:
-        with open('data/admin_password.json', 'r') as f:
+        with open(ADMIN_FILE, 'r') as f:
             return json.load(f)
     except FileNotFoundError:
         # Create default admin
@@ -111,94 +142,1667 @@ def load_admin_data():
         save_admin_data(default_admin)
         return default_admin
 
+def get_admin_data():
+    """Return the cached, read-only admin record"""
+    return _admin_cache.get()
+
+def load_admin_data():
+    """Return a mutable copy of the admin record"""
+    return dict(get_admin_data())
+
 def save_admin_data(data):
-    with open('data/admin_password.json', 'w') as f:
-        json.dump(data, f, indent=4)
+    _atomic_write_json(ADMIN_FILE, data, indent=4)
+    _admin_cache.invalidate()
+
+# Storage backends
+PRODUCTS_FILE = 'data/products.json'
+PRICE_HISTORY_FILE = 'data/price_history.json'
+PRICE_JOURNAL_FILE = 'data/price_history.journal.jsonl'
+PRICE_JOURNAL_COMPACTING_FILE = PRICE_JOURNAL_FILE + '.compacting'
+PRODUCT_CHANGES_FILE = 'data/product_changes.jsonl'
+
+def _file_signature(path):
+    """Return (inode, mtime_ns, size) for a file, or None if it does not exist"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+def _file_mtime(*paths):
+    """Return the latest mtime (epoch seconds) of the given files that exist, or None"""
+    mtimes = []
+    for path in paths:
+        try:
+            mtimes.append(os.stat(path).st_mtime)
+        except FileNotFoundError:
+            pass
+    return max(mtimes, default=None)
 
-def load_products():
+def _read_json_file(path, default):
     try:
-        with open('data/products.json', 'r') as f:
-            products = json.load(f)
-            # Ensure all products have required fields
-            for idx, product in enumerate(products):
-                if 'type' not in product:
-                    product['type'] = ''
-                if 'created_at' not in product:
-                    product['created_at'] = datetime.now().isoformat()
-                if 'last_updated' not in product:
-                    product['last_updated'] = datetime.now().isoformat()
-                if 'index' not in product:
-                    product['index'] = idx
-            return products
+        with open(path, 'r') as f:
+            return json.load(f)
     except (FileNotFoundError, json.JSONDecodeError):
-        return []
+        return default
+
+# Safe multi-worker file access
+LOCK_DIR = 'data/.locks'
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+_held_locks = threading.local()
+
+def _atomic_write_json(path, data, **kwargs):
+    """Write JSON to a temp file and rename it over path, so readers never see a partial file"""
+    _atomic_write(path, lambda f: json.dump(data, f, **kwargs))
+
+def _atomic_write(path, write, mode='w'):
+    """Call write(f) on a temp file and rename it over path, so readers never see a partial file"""
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp',
+                                    dir=os.path.dirname(path) or '.')
+    try:
+        with os.fdopen(fd, mode) as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+@contextmanager
+def data_lock(name):
+    """Hold an exclusive lock on one data file across threads and worker processes (re-entrant per thread)"""
+    held = getattr(_held_locks, 'names', None)
+    if held is None:
+        held = _held_locks.names = set()
+    if name in held:
+        yield
+        return
+    with _thread_locks_guard:
+        lock = _thread_locks.setdefault(name, threading.Lock())
+    with lock:
+        held.add(name)
+        try:
+            if fcntl is None:
+                yield
+                return
+            os.makedirs(LOCK_DIR, exist_ok=True)
+            with open(os.path.join(LOCK_DIR, name + '.lock'), 'a') as f:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        finally:
+            held.discard(name)
+
+class WriteBehindBuffer:
+    """Collects appended items and writes a burst of them in one flush after a short delay"""
+    def __init__(self, flush_func, delay, lock_name):
+        self._flush_func = flush_func
+        self._delay = delay
+        self._lock_name = lock_name
+        self._items = []
+        self._lock = threading.Lock()
+        self._timer = None
+
+    @property
+    def pending(self):
+        return bool(self._items)
+
+    def add(self, items):
+        with self._lock:
+            self._items.extend(items)
+            if self._timer is None:
+                self._timer = threading.Timer(self._delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        # The data lock is taken first so flushes are ordered and never interleave with other writers
+        with data_lock(self._lock_name):
+            with self._lock:
+                items, self._items = self._items, []
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+            if not items:
+                return
+            try:
+                self._flush_func(items)
+            except Exception:
+                with self._lock:
+                    self._items[:0] = items
+                raise
+
+class JsonStorage:
+    """Default backend: products and price history live in the JSON files under data/"""
+    name = 'json'
+
+    def products_signature(self):
+        return _file_signature(PRODUCTS_FILE)
+
+    def products_modified(self):
+        return _file_mtime(PRODUCTS_FILE)
+
+    def read_products(self):
+        return _read_json_file(PRODUCTS_FILE, [])
+
+    def write_products(self, products, changed, deleted):
+        _atomic_write_json(PRODUCTS_FILE, products, indent=4, default=str)
+
+    # Price history = price_history.json snapshot + append-only journal of price events
+    def history_signature(self):
+        return (_file_signature(PRICE_HISTORY_FILE), _file_signature(PRICE_JOURNAL_COMPACTING_FILE),
+                _file_signature(PRICE_JOURNAL_FILE))
+
+    def history_modified(self):
+        return _file_mtime(PRICE_HISTORY_FILE, PRICE_JOURNAL_COMPACTING_FILE, PRICE_JOURNAL_FILE)
+
+    def read_price_history(self):
+        history = _read_json_file(PRICE_HISTORY_FILE, {})
+        for path in (PRICE_JOURNAL_COMPACTING_FILE, PRICE_JOURNAL_FILE):
+            for event in _read_journal(path):
+                _apply_price_event(history, event)
+        return history
+
+    def write_price_history(self, history, changed, deleted):
+        # A full write already contains every journaled event, so the journal starts over
+        _atomic_write_json(PRICE_HISTORY_FILE, history, indent=4, default=str)
+        for path in (PRICE_JOURNAL_COMPACTING_FILE, PRICE_JOURNAL_FILE):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def append_price_events(self, events):
+        with open(PRICE_JOURNAL_FILE, 'a') as f:
+            f.write(''.join(json.dumps(e, default=str) + '\n' for e in events))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def compact_price_history(self):
+        """Fold the journal into price_history.json; returns the number of events folded"""
+        if not os.path.exists(PRICE_JOURNAL_COMPACTING_FILE):
+            if not os.path.exists(PRICE_JOURNAL_FILE):
+                return 0
+            # New appends go to a fresh journal while this segment is folded
+            os.replace(PRICE_JOURNAL_FILE, PRICE_JOURNAL_COMPACTING_FILE)
+        history = _read_json_file(PRICE_HISTORY_FILE, {})
+        events = _read_journal(PRICE_JOURNAL_COMPACTING_FILE)
+        for event in events:
+            _apply_price_event(history, event)
+        _atomic_write_json(PRICE_HISTORY_FILE, history, indent=4, default=str)
+        os.remove(PRICE_JOURNAL_COMPACTING_FILE)
+        return len(events)
+
+def _read_journal(path):
+    events = []
+    try:
+        with open(path, 'r') as f:
+            for line in f:
+                try:
+                    events.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # Torn last line from an interrupted append
+                    continue
+    except FileNotFoundError:
+        pass
+    return events
+
+def _apply_price_event(history, event):
+    """Replay one journaled price event onto a {product_id: [entries]} dict"""
+    product_id = event.get('product_id')
+    op = event.get('op')
+    if op == 'add':
+        entries = history.setdefault(product_id, [])
+        # Skip events already folded into the snapshot (replay during compaction)
+        for entry in reversed(entries):
+            if str(entry.get('date', '')) < event['date']:
+                break
+            if entry.get('date') == event['date'] and entry.get('price') == event['price']:
+                return
+        entries.append({'date': event['date'], 'price': event['price']})
+    elif op == 'clear':
+        history[product_id] = []
+    elif op == 'delete':
+        history.pop(product_id, None)
+
+class SqliteStorage:
+    """SQLite (WAL mode) backend that writes only the rows that changed"""
+    name = 'sqlite'
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS products (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            price REAL NOT NULL DEFAULT 0,
+            quantity INTEGER NOT NULL DEFAULT 0,
+            availability TEXT,
+            type TEXT,
+            position INTEGER NOT NULL,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_products_name ON products (name);
+        CREATE INDEX IF NOT EXISTS idx_products_type ON products (type);
+        CREATE INDEX IF NOT EXISTS idx_products_availability ON products (availability);
+        CREATE INDEX IF NOT EXISTS idx_products_price ON products (price);
+        CREATE INDEX IF NOT EXISTS idx_products_position ON products (position);
+        CREATE TABLE IF NOT EXISTS price_history (
+            product_id TEXT NOT NULL,
+            date TEXT NOT NULL,
+            price REAL NOT NULL,
+            PRIMARY KEY (product_id, date)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        conn = self._connect()
+        conn.executescript(self.SCHEMA)
+        # First run: seed the database from the existing JSON files. The marker keeps a catalog
+        # that was emptied on purpose from being reseeded on the next start.
+        if not self._get_meta('seeded'):
+            if conn.execute('SELECT COUNT(*) FROM products').fetchone()[0] == 0:
+                self.import_json()
+            else:
+                # Seeded before the marker existed
+                with conn:
+                    self._set_seeded(conn)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            import sqlite3
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _get_meta(self, key):
+        row = self._connect().execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else 0
+
+    @staticmethod
+    def _bump_meta(conn, key):
+        conn.execute('INSERT INTO meta (key, value) VALUES (?, 1) '
+                     'ON CONFLICT(key) DO UPDATE SET value = value + 1', (key,))
+
+    @staticmethod
+    def _set_seeded(conn):
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('seeded', 1)")
+
+    @staticmethod
+    def _product_row(position, product):
+        return (product['id'], product.get('name') or '', float(product.get('price') or 0),
+                int(product.get('quantity') or 0), product.get('availability'), product.get('type', ''),
+                position, json.dumps(product, default=str))
+
+    def products_signature(self):
+        return self._get_meta('products_version')
+
+    def products_modified(self):
+        # Any write (or checkpoint) touches the database or its WAL; a later time only costs a 304
+        return _file_mtime(self.path, self.path + '-wal')
+
+    def read_products(self):
+        rows = self._connect().execute('SELECT data FROM products ORDER BY position')
+        return [json.loads(data) for (data,) in rows]
+
+    def write_products(self, products, changed, deleted):
+        conn = self._connect()
+        with conn:
+            conn.executemany('DELETE FROM products WHERE id = ?', [(pid,) for pid in deleted])
+            conn.executemany('INSERT OR REPLACE INTO products '
+                             '(id, name, price, quantity, availability, type, position, data) '
+                             'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                             [self._product_row(pos, p) for pos, p in changed])
+            self._bump_meta(conn, 'products_version')
+
+    def history_signature(self):
+        return self._get_meta('history_version')
+
+    def history_modified(self):
+        return self.products_modified()
+
+    def read_price_history(self):
+        history = {}
+        rows = self._connect().execute('SELECT product_id, date, price FROM price_history ORDER BY product_id, date')
+        for product_id, date, price in rows:
+            history.setdefault(product_id, []).append({'date': date, 'price': price})
+        return history
+
+    def write_price_history(self, history, changed, deleted):
+        conn = self._connect()
+        with conn:
+            conn.executemany('DELETE FROM price_history WHERE product_id = ?',
+                             [(pid,) for pid in list(changed) + list(deleted)])
+            conn.executemany('INSERT OR REPLACE INTO price_history (product_id, date, price) VALUES (?, ?, ?)',
+                             [(pid, str(e['date']), float(e['price'])) for pid in changed for e in history[pid]])
+            self._bump_meta(conn, 'history_version')
+
+    def append_price_events(self, events):
+        conn = self._connect()
+        with conn:
+            for event in events:
+                product_id = event['product_id']
+                if event['op'] == 'add':
+                    conn.execute('INSERT OR REPLACE INTO price_history (product_id, date, price) VALUES (?, ?, ?)',
+                                 (product_id, event['date'], float(event['price'])))
+                else:
+                    conn.execute('DELETE FROM price_history WHERE product_id = ?', (product_id,))
+            self._bump_meta(conn, 'history_version')
+
+    def compact_price_history(self):
+        """Rows are already written individually; just checkpoint the WAL"""
+        self._connect().execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        return 0
+
+    def import_json(self):
+        """Replace the database contents with data/products.json and data/price_history.json"""
+        products = _read_json_file(PRODUCTS_FILE, [])
+        history = JsonStorage().read_price_history()
+        conn = self._connect()
+        with conn:
+            conn.execute('DELETE FROM products')
+            conn.execute('DELETE FROM price_history')
+            conn.executemany('INSERT OR REPLACE INTO products '
+                             '(id, name, price, quantity, availability, type, position, data) '
+                             'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                             [self._product_row(pos, p) for pos, p in enumerate(products)])
+            conn.executemany('INSERT OR REPLACE INTO price_history (product_id, date, price) VALUES (?, ?, ?)',
+                             [(pid, str(e['date']), float(e['price'])) for pid, entries in history.items() for e in entries])
+            self._bump_meta(conn, 'products_version')
+            self._bump_meta(conn, 'history_version')
+            self._set_seeded(conn)
+        return len(products)
+
+    def export_json(self):
+        """Write the database contents back to the JSON files"""
+        products = self.read_products()
+        json_storage = JsonStorage()
+        json_storage.write_products(products, [], [])
+        json_storage.write_price_history(self.read_price_history(), [], [])
+        return len(products)
+
+_storage = None
+_storage_lock = threading.Lock()
+
+def get_storage():
+    """Return the configured storage backend (STORAGE_BACKEND=json|sqlite)"""
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                if app.config['STORAGE_BACKEND'] == 'sqlite':
+                    _storage = SqliteStorage(app.config['SQLITE_PATH'])
+                else:
+                    _storage = JsonStorage()
+    return _storage
+
+# Cross-process change tracking
+SHARED_VERSIONS_FILE = 'data/.versions'
+
+class SharedVersions:
+    """Small mmap'd file of 64-bit change counters shared by every worker process
+
+    Slots 0-7 hold the counters and slots 8-15 the time of each counter's last bump.
+    """
+    SLOTS = {'products': 0, 'price_history': 1, 'config': 2, 'admin': 3}
+    SIZE = 8 * 16
+    MODIFIED_OFFSET = 8 * 8
+
+    def __init__(self, path):
+        self._path = path
+        self._mm = None
+        self._lock = threading.Lock()
+
+    def _map(self):
+        if self._mm is None:
+            with self._lock:
+                if self._mm is None:
+                    fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o644)
+                    try:
+                        if os.fstat(fd).st_size < self.SIZE:
+                            os.ftruncate(fd, self.SIZE)
+                        self._mm = mmap.mmap(fd, self.SIZE)
+                    finally:
+                        os.close(fd)
+        return self._mm
+
+    def get(self, name):
+        """Read a counter: a memory load, no system call"""
+        return struct.unpack_from('<Q', self._map(), 8 * self.SLOTS[name])[0]
+
+    def modified(self, name):
+        """Return the time of the counter's last bump (epoch seconds), or None if never bumped"""
+        return struct.unpack_from('<d', self._map(), self.MODIFIED_OFFSET + 8 * self.SLOTS[name])[0] or None
+
+    def bump(self, name):
+        """Increment a counter so every worker sees that this data changed"""
+        offset = 8 * self.SLOTS[name]
+        with data_lock('versions'):
+            mm = self._map()
+            value = struct.unpack_from('<Q', mm, offset)[0] + 1
+            struct.pack_into('<d', mm, self.MODIFIED_OFFSET + offset, time.time())
+            struct.pack_into('<Q', mm, offset, value)
+        return value
+
+shared_versions = SharedVersions(SHARED_VERSIONS_FILE)
+
+class VersionedCache:
+    """Process-wide cache of a loaded value.
+
+    Writers bump a shared version counter, which every worker checks in O(1). The storage
+    signature (file stat or DB counter) is only polled every few seconds, to catch edits made
+    outside the app.
+    """
+    def __init__(self, name, loader, signature, modified, poll_interval=5.0):
+        self.name = name
+        self._loader = loader
+        self._signature = signature
+        self._modified = modified
+        self._poll_interval = poll_interval
+        self._lock = threading.RLock()
+        self._version = 0
+        self._loaded = None  # (version, signature, value)
+        self._shared_seen = None
+        self._storage_signature = None
+        self._next_poll = 0
+
+    def _current_signature(self):
+        shared = shared_versions.get(self.name)
+        now = time.monotonic()
+        if shared != self._shared_seen or now >= self._next_poll:
+            self._storage_signature = self._signature()
+            self._shared_seen = shared
+            self._next_poll = now + self._poll_interval
+        return (shared, self._storage_signature)
+
+    def _load(self):
+        signature = self._current_signature()
+        loaded = self._loaded
+        if loaded is not None and loaded[0] == self._version and loaded[1] == signature:
+            return loaded
+        with self._lock:
+            loaded = self._loaded
+            if loaded is None or loaded[0] != self._version or loaded[1] != signature:
+                version = self._version
+                # Read before loading, so the value is never older than the time it is labelled with.
+                # Edits made outside the app do not bump the shared counter, so the storage mtime counts too.
+                modified = _latest(shared_versions.modified(self.name), self._modified())
+                value = self._loader(version)
+                tag = hashlib.sha1(repr((self.name, signature)).encode()).hexdigest()[:16]
+                loaded = (version, signature, value, tag, modified)
+                self._loaded = loaded
+            return loaded
+
+    def get(self):
+        return self._load()[2]
+
+    def get_versioned(self):
+        """Return (value, tag, modified): tag names the stored version the same way in every worker"""
+        return self._load()[2:]
+
+    def invalidate(self):
+        """Mark the cached value stale in this process and in every other worker"""
+        with self._lock:
+            self._version += 1
+        shared_versions.bump(self.name)
+
+class TTLCache:
+    """Small thread-safe LRU cache whose entries also expire `ttl` seconds after being set"""
+    def __init__(self, maxsize=256, ttl=30):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            if entry[0] < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+# Conditional GET
+def _build_tag():
+    # Responses change with the code and templates too, not only with the data
+    paths = [__file__] + [str(p) for p in Path(__file__).with_name('templates').glob('*.html')]
+    return str(max((os.stat(p).st_mtime_ns for p in paths if os.path.exists(p)), default=0))
+
+BUILD_TAG = _build_tag()
+
+def make_etag(*parts):
+    """Strong ETag value from data version tags and other inputs of a response"""
+    return hashlib.sha1(repr((BUILD_TAG,) + parts).encode()).hexdigest()
+
+def page_etag(*parts):
+    """ETag for a rendered page, which also depends on the config and who is logged in
+
+    Returns None (no validation) while flash messages are pending, as they are shown only once.
+    """
+    from flask import session
+    if session.get('_flashes'):
+        return None
+    config_tag = _volta_config_cache.get_versioned()[1]
+    return make_etag(config_tag, current_user.get_id() if current_user.is_authenticated else None, *parts)
+
+def conditional_response(etag, modified, build, private=False):
+    """Answer 304 if the client's copy is current (If-None-Match, else If-Modified-Since); otherwise build()
+
+    modified is an epoch timestamp or None. The body is only built when it has to be sent.
+    """
+    last_modified = datetime.fromtimestamp(int(modified), timezone.utc) if modified else None
+    if etag is None:
+        not_modified = False
+    elif request.if_none_match:
+        not_modified = request.if_none_match.contains(etag)
+    else:
+        not_modified = bool(last_modified and request.if_modified_since and last_modified <= request.if_modified_since)
+    
+    response = app.response_class(status=304) if not_modified else app.make_response(build())
+    if etag is not None:
+        response.set_etag(etag)
+        if last_modified:
+            response.last_modified = last_modified
+        # Cached copies must be revalidated, which is cheap now
+        response.headers['Cache-Control'] = 'private, no-cache' if private else 'no-cache'
+        if private:
+            response.vary.add('Cookie')
+    return response
+
+# Compressed JSON API responses
+MIN_COMPRESS_SIZE = 1024
+# Encoded bodies by ETag: repeat requests for the same data skip JSON encoding and compression
+_encoded_bodies = TTLCache(maxsize=64, ttl=3600)
+
+def negotiate_encoding():
+    """Pick 'br' (if the brotli package is installed), 'gzip' or None from Accept-Encoding"""
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+def json_api_response(etag, modified, build_payload, headers=None):
+    """Compact JSON with content-encoding negotiation and conditional GET
+
+    Each encoding is a separate representation, so it gets its own ETag; the encoded body is
+    cached under that ETag, which changes whenever the data does.
+    """
+    encoding = negotiate_encoding()
+    etag = f'{etag}-{encoding}' if encoding else etag
+    
+    def build():
+        cached = _encoded_bodies.get(etag)
+        if cached is None:
+            body = json.dumps(build_payload(), separators=(',', ':'), ensure_ascii=False, default=str).encode('utf-8')
+            used = None
+            if encoding and len(body) >= MIN_COMPRESS_SIZE:
+                body = brotli.compress(body, quality=5) if encoding == 'br' else gzip.compress(body, compresslevel=6)
+                used = encoding
+            cached = (body, used)
+            _encoded_bodies.set(etag, cached)
+        response = app.response_class(cached[0], mimetype='application/json')
+        if cached[1]:
+            response.headers['Content-Encoding'] = cached[1]
+        return response
+    
+    response = conditional_response(etag, modified, build)
+    response.vary.add('Accept-Encoding')
+    response.headers.update(headers or {})
+    return response
+
+def project_products(products, fields=None, columnar=False):
+    """Payload for product lists: optional field projection, as rows or as parallel arrays per field"""
+    if columnar:
+        fields = fields or list(dict.fromkeys(key for p in products for key in p))
+        return {'count': len(products), 'columns': {f: [p.get(f) for p in products] for f in fields}}
+    if fields:
+        return [{f: p[f] for f in fields if f in p} for p in products]
+    return [dict(p) for p in products]
+
+def _latest(*timestamps):
+    return max((t for t in timestamps if t), default=None)
+
+# Admin record cache (read by the Flask-Login user_loader on every authenticated request)
+_admin_cache = VersionedCache(
+    'admin',
+    lambda version: MappingProxyType(_read_admin_data()),
+    lambda: _file_signature(ADMIN_FILE),
+    lambda: _file_mtime(ADMIN_FILE))
+
+# Product catalog cache
+def normalize_product_name(name):
+    """Case- and whitespace-insensitive key used to match product names"""
+    return ' '.join(str(name).split()).casefold()
+
+class CatalogSnapshot:
+    """Read-only view of the product catalog at a single version, with lookup indexes"""
+    def __init__(self, products, version):
+        self.products = tuple(MappingProxyType(p) for p in products)
+        self.version = version
+        # id -> position and normalized name -> id, built once per catalog version
+        self.positions = {}
+        self.ids_by_name = {}
+        self._search_index = None
+        self._name_prefixes = None
+        self._facets = None
+        self._summary = None
+        self._sort_orders = {}
+        # Search-as-you-type results for hot prefixes; dropped together with this snapshot
+        self.suggestions = TTLCache(maxsize=512, ttl=30)
+        for pos, product in enumerate(self.products):
+            self.positions.setdefault(product['id'], pos)
+            self.ids_by_name.setdefault(normalize_product_name(product.get('name', '')), product['id'])
+
+    def get(self, product_id):
+        """Return the product with this id, or None"""
+        pos = self.positions.get(product_id)
+        return None if pos is None else self.products[pos]
+
+    def find_by_name(self, name):
+        """Return the id of the product with this (normalized) name, or None"""
+        return self.ids_by_name.get(normalize_product_name(name))
+
+    @property
+    def search_index(self):
+        """Inverted index over name/description/type, built on first use for this catalog version"""
+        if self._search_index is None:
+            self._search_index = SearchIndex(self.products)
+        return self._search_index
+
+    @property
+    def facets(self):
+        """Type/availability bitmaps and the price-sorted array, built on first use for this catalog version"""
+        if self._facets is None:
+            self._facets = CatalogFacets(self.products)
+        return self._facets
+
+    @property
+    def summary(self):
+        """catalog_summary() of the whole catalog, computed on first use for this catalog version"""
+        if self._summary is None:
+            self._summary = catalog_summary(self.products)
+        return self._summary
+
+    def sorted_positions(self, sort):
+        """Catalog positions in ascending order of a CATALOG_SORT_KEYS key, cached for this catalog version"""
+        order = self._sort_orders.get(sort)
+        if order is None:
+            key = CATALOG_SORT_KEYS[sort]
+            order = sorted(range(len(self.products)), key=lambda pos: (key(self.products[pos]), pos))
+            self._sort_orders[sort] = order
+        return order
+
+    def search_positions(self, query):
+        """Return the positions of products matching query, ranked by BM25F relevance, then match score, then catalog order"""
+        index = self.search_index
+        scores = index.match(query)
+        relevance = index.relevance(query)
+        return sorted(scores, key=lambda pos: (-relevance.get(pos, 0), -scores[pos], pos))
+
+    def search(self, query):
+        """Return the products matching query, best match first"""
+        return [self.products[pos] for pos in self.search_positions(query)]
+
+    @property
+    def name_prefixes(self):
+        """Sorted (name key, position) pairs: each product's normalized name from every word onwards"""
+        if self._name_prefixes is None:
+            entries = []
+            for pos, product in enumerate(self.products):
+                words = normalize_product_name(product.get('name', '')).split()
+                entries.extend((' '.join(words[i:]), pos) for i in range(len(words)))
+            entries.sort()
+            self._name_prefixes = ([key for key, _ in entries], [pos for _, pos in entries])
+        return self._name_prefixes
+
+    def suggest(self, query, limit=8):
+        """Return up to `limit` products for a partially typed query
+
+        Names starting with the query come first, then names with a word starting with it,
+        then regular search results.
+        """
+        query = normalize_product_name(query)
+        cache_key = (query, limit)
+        cached = self.suggestions.get(cache_key)
+        if cached is None:
+            keys, positions = self.name_prefixes
+            start = bisect.bisect_left(keys, query)
+            end = bisect.bisect_left(keys, query + '\U0010ffff')
+            ranked = sorted(set(positions[start:end]), key=lambda pos: (
+                not normalize_product_name(self.products[pos].get('name', '')).startswith(query),
+                len(self.products[pos].get('name', '')), pos))
+            cached = ranked[:limit]
+            if len(cached) < limit:
+                seen = set(cached)
+                for product in self.search(query):
+                    if len(cached) >= limit:
+                        break
+                    pos = self.positions[product['id']]
+                    if pos not in seen:
+                        cached.append(pos)
+            cached = tuple(cached)
+            self.suggestions.set(cache_key, cached)
+        return [self.products[pos] for pos in cached]
+
+    def __len__(self):
+        return len(self.products)
+
+    def __iter__(self):
+        return iter(self.products)
+
+# Stable sort keys for catalog pages (ties are broken by catalog position)
+CATALOG_SORT_KEYS = {
+    'index': lambda p: p.get('index', 0),
+    'price': lambda p: p['price'],
+    'name': lambda p: normalize_product_name(p.get('name', '')),
+    'last_updated': lambda p: str(p.get('last_updated', '')),
+}
+
+def page_args(default_per_page=24, max_per_page=100, default_sort='index'):
+    """Read page, per_page, sort and order from the query string, falling back to defaults for bad values"""
+    page = max(request.args.get('page', 1, type=int) or 1, 1)
+    per_page = request.args.get('per_page', default_per_page, type=int)
+    if per_page is None or per_page < 1:
+        per_page = default_per_page
+    per_page = min(per_page, max_per_page)
+    sort = request.args.get('sort', default_sort)
+    if sort not in CATALOG_SORT_KEYS and sort != 'relevance':
+        sort = default_sort
+    order = 'desc' if request.args.get('order') == 'desc' else 'asc'
+    return {'page': page, 'per_page': per_page, 'sort': sort, 'order': order}
+
+def catalog_page(catalog, args, selected=None, ranked=None):
+    """Return one page of products plus paging info
+
+    selected is an optional bitmap of the products to list and ranked an optional list of
+    positions in relevance order (used when sort is 'relevance'). Without a filter a page is a
+    slice of the cached sort order; with one, the order is walked only up to the end of the page.
+    """
+    page, per_page = args['page'], args['per_page']
+    start = (page - 1) * per_page
+    if ranked is not None and args['sort'] == 'relevance':
+        order = ranked if selected is None else [pos for pos in ranked if selected >> pos & 1]
+        total = len(order)
+        if args['order'] == 'desc':
+            order = order[::-1]
+        positions = order[start:start + per_page]
+    else:
+        order = catalog.sorted_positions('index' if args['sort'] == 'relevance' else args['sort'])
+        descending = args['order'] == 'desc'
+        if selected is None:
+            total = len(order)
+            if descending:
+                positions = order[max(total - start - per_page, 0):max(total - start, 0)][::-1]
+            else:
+                positions = order[start:start + per_page]
+        else:
+            total = _popcount(selected)
+            matching = (pos for pos in (reversed(order) if descending else order) if selected >> pos & 1)
+            positions = list(itertools.islice(matching, start, start + per_page))
+    return {
+        'products': [catalog.products[pos] for pos in positions],
+        'total': total,
+        'page': page,
+        'per_page': per_page,
+        'pages': max(1, -(-total // per_page)),
+        'sort': args['sort'],
+        'order': args['order'],
+    }
+
+def page_url(page):
+    """URL of the current view with a different page number"""
+    args = request.args.to_dict()
+    args['page'] = page
+    return url_for(request.endpoint, **(request.view_args or {}), **args)
+
+app.jinja_env.globals['page_url'] = page_url
+
+def catalog_summary(products):
+    """Totals shown above and below the product grid, over every listed product (not just one page)"""
+    count = len(products)
+    return {
+        'count': count,
+        'in_stock': sum(1 for p in products if p.get('availability') == 'In Stock'),
+        'average_price': sum(p['price'] for p in products) / count if count else 0,
+        'total_units': sum(p['quantity'] for p in products),
+        'total_value': sum(p['price'] * p['quantity'] for p in products),
+    }
+
+def _popcount(bits):
+    return bin(bits).count('1')
+
+def _bitmap(positions):
+    """Return an int with the bits of the given positions set"""
+    bits = 0
+    for pos in positions:
+        bits |= 1 << pos
+    return bits
+
+def _bitmap_positions(bits):
+    """Yield the set bit positions of an int bitmap in ascending order"""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+class CatalogFacets:
+    """Filter indexes for catalog browsing.
+
+    Products are bits in Python int bitmaps (bit n = catalog position n), one bitmap per type
+    and per availability value, so filters combine with & and facet counts are popcounts.
+    Prices are kept sorted for bisect range queries.
+    """
+    def __init__(self, products):
+        self.size = len(products)
+        self.all = (1 << self.size) - 1
+        self.by_type = {}
+        self.by_availability = {}
+        for pos, product in enumerate(products):
+            self.by_type[product.get('type')] = self.by_type.get(product.get('type'), 0) | (1 << pos)
+            self.by_availability[product.get('availability')] = self.by_availability.get(product.get('availability'), 0) | (1 << pos)
+        self.types = sorted(t for t in self.by_type if t)
+        order = sorted(range(self.size), key=lambda pos: products[pos]['price'])
+        self.price_order = order
+        self.prices = [products[pos]['price'] for pos in order]
+
+    def price_range(self, min_price=None, max_price=None):
+        """Bitmap of products priced within [min_price, max_price]"""
+        if min_price is None and max_price is None:
+            return self.all
+        start = 0 if min_price is None else bisect.bisect_left(self.prices, min_price)
+        end = self.size if max_price is None else bisect.bisect_right(self.prices, max_price)
+        return _bitmap(self.price_order[start:end])
+
+    def filter(self, device_type=None, availability=None, min_price=None, max_price=None):
+        """Bitmap of products passing every given filter ('all' or None means no filter)"""
+        bits = self.price_range(min_price, max_price)
+        if device_type and device_type != 'all':
+            bits &= self.by_type.get(device_type, 0)
+        if availability and availability != 'all':
+            bits &= self.by_availability.get(availability, 0)
+        return bits
+
+    def type_counts(self, bits):
+        """Number of products of each type within a bitmap"""
+        return {t: _popcount(bits & self.by_type[t]) for t in self.types}
+
+    def availability_counts(self, bits):
+        """Number of products with each availability value within a bitmap"""
+        return {a: _popcount(bits & b) for a, b in self.by_availability.items() if a}
+
+def _trigrams(word):
+    padded = f'  {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def edit_distance(a, b, limit):
+    """Levenshtein distance with adjacent transpositions, or limit + 1 once it exceeds limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+class SearchIndex:
+    """Term index for /search: exact (3), prefix (2) and substring (1) word matches.
+
+    Documents are the lowercased "name description type" text of each product, split on
+    whitespace. Prefix lookups bisect the sorted term list; substring lookups bisect a sorted
+    array of every suffix of every term, so a query only touches the postings it matches.
+
+    Query words that match nothing fall back to a trigram index over the name and type
+    vocabulary: candidates sharing enough trigrams are re-ranked by edit distance.
+
+    Ranking uses BM25F over punctuation-stripped terms with per-field boosts. The term-document
+    weights are stored CSR-style in NumPy arrays, so scoring a query is a few array operations.
+    """
+    PUNCTUATION = '.,!?;:'
+    BM25_FIELDS = (('name', 3.0), ('type', 2.0), ('description', 1.0))
+    BM25_K1 = 1.2
+    BM25_B = 0.75
+    # How much a query word counts towards a term it matches by prefix, substring or typo
+    EXPANSION_WEIGHTS = {'exact': 1.0, 'prefix': 0.6, 'substring': 0.3, 'fuzzy': 0.5}
+
+    def __init__(self, products):
+        exact = {}
+        postings = {}
+        for pos, product in enumerate(products):
+            searchable = f"{product.get('name', '').lower()} {(product.get('description') or '').lower()} {product.get('type', '').lower()}"
+            for token in searchable.split():
+                postings.setdefault(token, set()).add(pos)
+                exact.setdefault(token.strip(self.PUNCTUATION), set()).add(pos)
+        self.exact = exact
+        self.terms = sorted(postings)
+        self.term_postings = [postings[term] for term in self.terms]
+        suffixes = sorted((term[i:], term_id) for term_id, term in enumerate(self.terms) for i in range(len(term)))
+        self.suffixes = [suffix for suffix, _ in suffixes]
+        self.suffix_terms = [term_id for _, term_id in suffixes]
+
+        # Typo tolerance: name/type words (also split at '-', '/', ...) -> products, and trigram -> words
+        fuzzy_postings = {}
+        for pos, product in enumerate(products):
+            text = f"{product.get('name', '').lower()} {product.get('type', '').lower()}"
+            words = set(re.findall(r'[^\W_]+', text))
+            words.update(token.strip(self.PUNCTUATION) for token in text.split())
+            for word in words:
+                if word:
+                    fuzzy_postings.setdefault(word, set()).add(pos)
+        self.fuzzy_postings = fuzzy_postings
+        self.trigram_words = {}
+        for word in fuzzy_postings:
+            for gram in _trigrams(word):
+                self.trigram_words.setdefault(gram, []).append(word)
+
+        self._build_bm25(products)
+
+    def _build_bm25(self, products):
+        """Precompute idf * saturated BM25F term frequency for every (term, product) pair"""
+        k1, b = self.BM25_K1, self.BM25_B
+        self.size = len(products)
+        self.term_ids = {term: term_id for term_id, term in enumerate(sorted(t for t in self.exact if t))}
+        fields = [[[t for t in (token.strip(self.PUNCTUATION) for token in str(product.get(field) or '').lower().split()) if t]
+                   for field, _ in self.BM25_FIELDS] for product in products]
+        avg_lengths = [max(1.0, sum(len(doc[i]) for doc in fields) / max(1, len(products)))
+                       for i in range(len(self.BM25_FIELDS))]
+        postings = [[] for _ in self.term_ids]
+        for pos, doc in enumerate(fields):
+            frequencies = {}
+            for (_, boost), tokens, avg_length in zip(self.BM25_FIELDS, doc, avg_lengths):
+                weight = boost / (1 - b + b * len(tokens) / avg_length)
+                for token in tokens:
+                    frequencies[token] = frequencies.get(token, 0.0) + weight
+            for token, frequency in frequencies.items():
+                postings[self.term_ids[token]].append((pos, frequency))
+
+        doc_freq = np.array([len(p) for p in postings], dtype=np.int64)
+        self.bm25_indptr = np.concatenate(([0], np.cumsum(doc_freq)))
+        self.bm25_docs = np.array([pos for p in postings for pos, _ in p], dtype=np.int64)
+        tf = np.array([f for p in postings for _, f in p], dtype=np.float64)
+        idf = np.log(1 + (self.size - doc_freq + 0.5) / (doc_freq + 0.5))
+        self.bm25_weights = np.repeat(idf, doc_freq) * tf * (k1 + 1) / (tf + k1)
+        # Raw (unstripped) term id -> BM25 term id, for prefix and substring expansions
+        self.raw_to_term = np.array([self.term_ids.get(term.strip(self.PUNCTUATION), -1) for term in self.terms] or [-1],
+                                    dtype=np.int64)
+
+    def _prefix_range(self, keys, prefix):
+        start = bisect.bisect_left(keys, prefix)
+        end = start
+        while end < len(keys) and keys[end].startswith(prefix):
+            end += 1
+        return start, end
+
+    def prefix_docs(self, word):
+        """Positions of products with a term starting with word"""
+        start, end = self._prefix_range(self.terms, word)
+        return set().union(*self.term_postings[start:end])
+
+    def substring_docs(self, word):
+        """Positions of products with a term containing word"""
+        start, end = self._prefix_range(self.suffixes, word)
+        term_ids = set(self.suffix_terms[start:end])
+        return set().union(*(self.term_postings[term_id] for term_id in term_ids))
+
+    @staticmethod
+    def max_typos(word):
+        """Edits tolerated for a query word: none for short words, 1 up to 7 characters, then 2"""
+        if len(word) < 4:
+            return 0
+        return 1 if len(word) <= 7 else 2
+
+    def fuzzy_words(self, word):
+        """Return [(vocabulary word, edit distance)] within max_typos(word) of word"""
+        limit = self.max_typos(word)
+        if not limit:
+            return []
+        grams = _trigrams(word)
+        # Each edit changes at most 3 trigrams, so closer words must share the rest
+        needed = max(1, len(grams) - 3 * limit)
+        shared = {}
+        for gram in grams:
+            for candidate in self.trigram_words.get(gram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+        matches = []
+        for candidate, count in shared.items():
+            if count >= needed:
+                distance = edit_distance(word, candidate, limit)
+                if distance <= limit:
+                    matches.append((candidate, distance))
+        return matches
+
+    def match(self, query):
+        """Return {position: score}, summing 3/2/1 per query word for exact/prefix/substring matches
+
+        A word with no such match scores 1 / (1 + edit distance) for its closest fuzzy match.
+        """
+        scores = {}
+        for word in query.lower().split():
+            # A word contributes its best match type once per product
+            word_scores = dict.fromkeys(self.substring_docs(word), 1)
+            word_scores.update(dict.fromkeys(self.prefix_docs(word), 2))
+            word_scores.update(dict.fromkeys(self.exact.get(word, ()), 3))
+            if not word_scores:
+                for candidate, distance in self.fuzzy_words(word):
+                    for pos in self.fuzzy_postings[candidate]:
+                        word_scores[pos] = max(word_scores.get(pos, 0), 1 / (1 + distance))
+            for pos, score in word_scores.items():
+                scores[pos] = scores.get(pos, 0) + score
+        return scores
+
+    def _word_expansions(self, word):
+        """Return {BM25 term id: weight} for the terms a query word matches"""
+        weights = self.EXPANSION_WEIGHTS
+        expansions = {}
+
+        def expand(term_ids, weight):
+            for term_id in term_ids:
+                if term_id >= 0 and expansions.get(term_id, 0) < weight:
+                    expansions[term_id] = weight
+
+        start, end = self._prefix_range(self.suffixes, word)
+        expand(self.raw_to_term[self.suffix_terms[start:end]].tolist(), weights['substring'])
+        start, end = self._prefix_range(self.terms, word)
+        expand(self.raw_to_term[start:end].tolist(), weights['prefix'])
+        expand([self.term_ids.get(word, -1)], weights['exact'])
+        if not expansions:
+            for candidate, distance in self.fuzzy_words(word):
+                expand([self.term_ids.get(candidate, -1)], weights['fuzzy'] / (1 + distance))
+        return expansions
+
+    def relevance(self, query):
+        """Return {position: BM25F score} for the products whose postings match query
+
+        Each query word counts once per product, through its best-weighted matching term. Only the
+        matched postings are touched, so the cost does not grow with the catalog.
+        """
+        scores = {}
+        for word in query.lower().split():
+            expansions = self._word_expansions(word)
+            if not expansions:
+                continue
+            term_ids = np.fromiter(expansions, dtype=np.int64, count=len(expansions))
+            starts, ends = self.bm25_indptr[term_ids], self.bm25_indptr[term_ids + 1]
+            lengths = ends - starts
+            # Gather every posting of every expansion term in one pass
+            offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+            values = self.bm25_weights[offsets] * np.repeat(np.fromiter(expansions.values(), dtype=np.float64), lengths)
+            docs = self.bm25_docs[offsets]
+            # Best value per product: sort by product, highest value first, and take each run's head
+            order = np.lexsort((-values, docs))
+            docs, values = docs[order], values[order]
+            first = np.empty(len(docs), dtype=bool)
+            first[:1] = True
+            first[1:] = docs[1:] != docs[:-1]
+            for pos, value in zip(docs[first].tolist(), values[first].tolist()):
+                scores[pos] = scores.get(pos, 0) + value
+        return scores
+
+def _prepare_products(products):
+    # Ensure all products have required fields
+    for idx, product in enumerate(products):
+        if 'type' not in product:
+            product['type'] = ''
+        if 'created_at' not in product:
+            product['created_at'] = datetime.now().isoformat()
+        if 'last_updated' not in product:
+            product['last_updated'] = datetime.now().isoformat()
+        if 'index' not in product:
+            product['index'] = idx
+    return products
+
+def _load_catalog(version):
+    catalog = CatalogSnapshot(_prepare_products(get_storage().read_products()), version)
+    # Edits that bypassed save_products() (hand-edited JSON, import-json) still reach the change log
+    if not product_changes.is_synced(get_storage().products_signature()):
+        product_changes.sync_soon()
+    return catalog
+
+_catalog_cache = VersionedCache(
+    'products',
+    _load_catalog,
+    lambda: get_storage().products_signature(),
+    lambda: get_storage().products_modified())
+
+def get_catalog():
+    """Return the cached catalog snapshot, reloading only when the stored catalog or the version changes"""
+    return _catalog_cache.get()
+
+def invalidate_catalog():
+    """Bump the catalog version so the next get_catalog() call reloads"""
+    _catalog_cache.invalidate()
+
+def load_products(catalog=None):
+    """Return a mutable copy of the catalog (in the same order) for read-modify-write callers"""
+    return [dict(p) for p in (catalog or get_catalog()).products]
+
+def _diff_products(previous, products):
+    """Return ([(position, product)], [deleted ids]) between a snapshot and a new product list"""
+    old = {p['id']: (pos, p) for pos, p in enumerate(previous)}
+    changed = []
+    for pos, product in enumerate(products):
+        entry = old.pop(product['id'], None)
+        if entry is None or entry[0] != pos or entry[1] != product:
+            changed.append((pos, product))
+    return changed, list(old)
 
 def save_products(products):
-    with open('data/products.json', 'w') as f:
-        json.dump(products, f, indent=4, default=str)
+    """Write the catalog (callers hold data_lock('products')) and record the change in the change log"""
+    previous = get_catalog()
+    changed, deleted = _diff_products(previous.products, products)
+    get_storage().write_products(products, changed, deleted)
+    invalidate_catalog()
+    # Logged after the catalog version bump, so a reader who sees the entry also sees the new catalog.
+    # Products that only moved position (e.g. after a delete) are not changes to their data.
+    updated = [p for _, p in changed if previous.get(p['id']) != p]
+    product_changes.append(updated, deleted, get_storage().products_signature(), seed=products)
+
+# Product change log
+def _product_hash(product):
+    return hashlib.sha1(json.dumps(product, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+def _json_value(value):
+    """value as it reads back from JSON (tuples become lists), for comparisons with logged values"""
+    return json.loads(json.dumps(value))
+
+class ProductChangeLog:
+    """Append-only log of product upserts and deletes, for delta sync via /api/products/changes
+
+    Each save_products() call appends one batch of entries that share a new version number.
+    Versions only grow, so a client passes the last version it has seen and receives only the
+    products changed since (deletes as tombstones). The first write seeds the log with the whole
+    catalog, so since=0 is a full sync.
+
+    Upserts carry a hash of the product, and every batch ends with a 'synced' record of the storage
+    signature it reflects. A catalog stored at any other signature was changed outside
+    save_products(); sync() diffs it against the logged hashes and logs the difference.
+    """
+    def __init__(self, path):
+        self._path = path
+        self._lock = threading.Lock()
+        self._loaded = None  # (file signature, entries, versions, synced storage signature)
+        self._syncing = False
+
+    def _load(self):
+        signature = _file_signature(self._path)
+        loaded = self._loaded
+        if loaded is None or loaded[0] != signature:
+            with self._lock:
+                records = _read_journal(self._path)
+                entries = [e for e in records if 'version' in e]
+                synced = next((r['synced'] for r in reversed(records) if 'synced' in r), None)
+                loaded = (signature, entries, [e['version'] for e in entries], synced)
+                self._loaded = loaded
+        return loaded
+
+    def latest_version(self):
+        versions = self._load()[2]
+        return versions[-1] if versions else 0
+
+    def is_synced(self, storage_signature):
+        """True if the log reflects the catalog stored at this storage signature"""
+        synced = self._load()[3]
+        return synced is not None and synced == _json_value(storage_signature)
+
+    def _write(self, entries):
+        with open(self._path, 'a') as f:
+            f.write(''.join(json.dumps(e) + '\n' for e in entries))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def append(self, upserted, deleted, storage_signature, seed=None):
+        """Record one batch of changes (upserted products, deleted ids); callers hold data_lock('products')"""
+        if not os.path.exists(self._path) and seed is not None:
+            upserted = seed
+        version = self.latest_version() + 1 if upserted or deleted else self.latest_version()
+        now = datetime.now().isoformat()
+        self._write([{'version': version, 'op': 'upsert', 'id': p['id'], 'hash': _product_hash(p), 'time': now}
+                     for p in upserted] +
+                    [{'version': version, 'op': 'delete', 'id': pid, 'time': now} for pid in deleted] +
+                    [{'synced': _json_value(storage_signature)}])
+        return version
+
+    def sync(self):
+        """Log the products that differ between the stored catalog and the log; returns how many"""
+        with data_lock('products'):
+            storage = get_storage()
+            # Signature first: the products read next are at least that new
+            signature = storage.products_signature()
+            if self.is_synced(signature):
+                return 0
+            products = storage.read_products()
+            logged = {}
+            for entry in self._load()[1]:
+                logged[entry['id']] = entry.get('hash') if entry['op'] == 'upsert' else None
+            upserted = [p for p in products if logged.pop(p['id'], None) != _product_hash(p)]
+            deleted = [pid for pid, product_hash in logged.items() if product_hash is not None]
+            self.append(upserted, deleted, signature)
+            return len(upserted) + len(deleted)
+
+    def sync_soon(self):
+        """Run sync() on a background thread, so the request that noticed the change does not write"""
+        with self._lock:
+            if self._syncing:
+                return
+            self._syncing = True
+
+        def run():
+            try:
+                changed = self.sync()
+                if changed:
+                    print(f"[INFO] Product change log synced with the stored catalog: {changed} change(s)")
+            except Exception as e:
+                print(f"[WARNING] Product change log sync failed: {e}")
+            finally:
+                self._syncing = False
+
+        threading.Thread(target=run, name='product-changes-sync', daemon=True).start()
+
+    def changes_since(self, since):
+        """Return (latest version, {product id: last entry}) for entries newer than since"""
+        _, entries, versions, _ = self._load()
+        latest = {}
+        for entry in entries[bisect.bisect_right(versions, since):]:
+            latest[entry['id']] = entry
+        return (versions[-1] if versions else 0), latest
+
+    def compact(self):
+        """Keep only the newest entry of each product; returns the number of entries dropped"""
+        with data_lock('products'):
+            _, entries, _, synced = self._load()
+            latest = {}
+            for entry in entries:
+                latest.pop(entry['id'], None)
+                latest[entry['id']] = entry
+            if len(latest) == len(entries):
+                return 0
+            records = list(latest.values()) + [{'synced': synced}]
+            _atomic_write(self._path, lambda f: f.write(''.join(json.dumps(e) + '\n' for e in records)))
+            return len(entries) - len(latest)
+
+product_changes = ProductChangeLog(PRODUCT_CHANGES_FILE)
+
+def sync_product_changes_job():
+    """Scheduled job: seed the product change log at startup, then catch any edits it missed"""
+    changed = product_changes.sync()
+    if changed:
+        print(f"[INFO] Product change log synced with the stored catalog: {changed} change(s)")
+
+def compact_product_changes_job():
+    """Scheduled job: drop superseded product change log entries"""
+    dropped = product_changes.compact()
+    if dropped:
+        print(f"[INFO] Compacted {dropped} product change log entries")
+
+# Price statistics
+def _price_delta(old, new):
+    return {'from': old, 'to': new, 'amount': round(new - old, 2),
+            'percent': round((new - old) / old * 100, 2) if old else None}
+
+class PriceStats:
+    """Running aggregates of one product's recorded prices
+
+    add() folds in one price event in O(1): count, sum, min, max, the latest price and the last
+    change. Entries record the price that held until their date, so the last change happened
+    after the previous entry. Dates and prices are also kept in parallel lists for price_at().
+    """
+    def __init__(self, entries=()):
+        self.dates = []
+        self.prices = []
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.first_date = None
+        self.last_date = None
+        self.last_price = None
+        self.last_change = None
+        for entry in entries:
+            self.add(entry['date'], entry['price'])
+
+    def add(self, date, price):
+        price = float(price)
+        self.dates.append(str(date))
+        self.prices.append(price)
+        if self.last_price is not None and price != self.last_price:
+            self.last_change = {'date': self.last_date, 'from': self.last_price, 'to': price}
+        self.count += 1
+        self.total += price
+        self.min = price if self.min is None else min(self.min, price)
+        self.max = price if self.max is None else max(self.max, price)
+        if self.first_date is None:
+            self.first_date = date
+        self.last_date = date
+        self.last_price = price
+
+    def follows(self, entries):
+        """True if entries are the entries folded so far plus newer ones, so extend() can catch up"""
+        n = self.count
+        if len(entries) < n:
+            return False
+        return n == 0 or (str(entries[0]['date']) == self.dates[0] and str(entries[n - 1]['date']) == self.dates[-1])
+
+    def extend(self, entries):
+        """Fold in the entries appended since the last add()"""
+        for entry in entries[self.count:]:
+            self.add(entry['date'], entry['price'])
+
+    def price_at(self, when, current_price):
+        """Price in effect at an ISO date/time: the first entry after it, else the current price"""
+        # Bisect the date list: bisect's key= argument needs Python 3.10
+        i = bisect.bisect_right(self.dates, when)
+        return self.prices[i] if i < len(self.prices) else current_price
+
+    def summary(self, current_price):
+        """JSON-ready aggregates, with the current price as the latest point
+
+        count, sum, average, min and max include the current price unless today's last entry
+        already recorded it; 'recorded' is the number of history entries alone.
+        """
+        current_price = float(current_price)
+        today = datetime.now().date()
+        count, total, low, high = self.count, self.total, self.min, self.max
+        if not (self.dates and self.dates[-1][:10] == today.isoformat() and self.last_price == current_price):
+            count += 1
+            total += current_price
+            low = current_price if low is None else min(low, current_price)
+            high = current_price if high is None else max(high, current_price)
+        
+        last_change = self.last_change
+        if self.count and current_price != self.last_price:
+            last_change = {'date': self.last_date, 'from': self.last_price, 'to': current_price}
+        if last_change:
+            last_change = dict(_price_delta(last_change['from'], last_change['to']), date=last_change['date'])
+        
+        # Windows start at midnight, so the deltas only move once a day (like the page ETags)
+        return {
+            'count': count,
+            'recorded': self.count,
+            'sum': round(total, 2),
+            'average': round(total / count, 2),
+            'min': low,
+            'max': high,
+            'first_date': self.first_date,
+            'last_date': self.last_date,
+            'last_change': last_change,
+            'change_7d': _price_delta(self.price_at((today - timedelta(days=7)).isoformat(), current_price), current_price),
+            'change_30d': _price_delta(self.price_at((today - timedelta(days=30)).isoformat(), current_price), current_price),
+        }
+
+# PriceStats carry over from one history version to the next: {product_id: (load sequence, stats)}
+_price_stats = {}
+_price_stats_lock = threading.Lock()
+_price_history_loads = itertools.count(1)
+
+class PriceHistory(dict):
+    """{product_id: [entries]} of one history version, with each product's PriceStats
+
+    A product's stats are brought up to this version on first use. If the version only appended
+    events, those are folded in with add(). Stats are rebuilt only when the entries were rewritten
+    (retention, clear or delete). Compaction keeps the entries, so it does not trigger a rebuild.
+    """
+    def __init__(self, history):
+        super().__init__(history)
+        self.sequence = next(_price_history_loads)
+        self._stats = {}
+
+    def stats(self, product_id):
+        stats = self._stats.get(product_id)
+        if stats is None:
+            entries = self.get(product_id, [])
+            with _price_stats_lock:
+                sequence, stats = _price_stats.get(product_id, (0, None))
+                if sequence > self.sequence:
+                    # A newer version already moved the shared stats on; this one gets its own
+                    stats = PriceStats(entries)
+                else:
+                    if stats is not None and stats.follows(entries):
+                        stats.extend(entries)
+                    else:
+                        stats = PriceStats(entries)
+                    _price_stats[product_id] = (self.sequence, stats)
+            self._stats[product_id] = stats
+        return stats
+
+# Price history cache
+_price_history_cache = VersionedCache(
+    'price_history',
+    lambda version: PriceHistory(get_storage().read_price_history()),
+    lambda: get_storage().history_signature(),
+    lambda: get_storage().history_modified())
+
+def _current_price_history():
+    # Read-your-writes: buffered price events are flushed before the history is read
+    if _price_event_buffer.pending:
+        _price_event_buffer.flush()
+    return _price_history_cache.get()
+
+def price_history_version():
+    """Return (tag, modified) of the current price history, see VersionedCache.get_versioned()"""
+    if _price_event_buffer.pending:
+        _price_event_buffer.flush()
+    return _price_history_cache.get_versioned()[1:]
 
 def load_price_history():
-    try:
-        with open('data/price_history.json', 'r') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return {}
+    """Return a mutable copy of the full price history"""
+    return {pid: [dict(e) for e in entries] for pid, entries in _current_price_history().items()}
+
+def get_price_history(product_id):
+    """Return the cached price history of one product (do not mutate)"""
+    return _current_price_history().get(product_id, [])
+
+def get_price_stats(product_id):
+    """Return the PriceStats of one product for the current history version"""
+    return _current_price_history().stats(product_id)
 
 def save_price_history(history):
-    with open('data/price_history.json', 'w') as f:
-        json.dump(history, f, indent=4, default=str)
+    previous = _current_price_history()
+    changed = [pid for pid, entries in history.items() if previous.get(pid) != entries]
+    deleted = [pid for pid in previous if pid not in history]
+    get_storage().write_price_history(history, changed, deleted)
+    _price_history_cache.invalidate()
+
+def price_event(product_id, price):
+    """Build an 'add' price event for append_price_events()"""
+    return {'op': 'add', 'product_id': product_id, 'date': datetime.now().isoformat(), 'price': price}
+
+def _write_price_events(events):
+    get_storage().append_price_events(events)
+    _price_history_cache.invalidate()
+
+# Bursts of price events (e.g. several quick admin edits) are coalesced into one journal append
+_price_event_buffer = WriteBehindBuffer(_write_price_events, delay=0.5, lock_name='price_history')
+atexit.register(_price_event_buffer.flush)
+
+def append_price_events(events):
+    """Queue price events for the history journal without rewriting the history"""
+    if events:
+        _price_event_buffer.add(events)
+
+def compact_price_history():
+    """Fold the price history journal into the snapshot"""
+    with data_lock('price_history'):
+        _price_event_buffer.flush()
+        folded = get_storage().compact_price_history()
+        _price_history_cache.invalidate()
+    return folded
+
+def compact_price_history_job():
+    """Scheduled job: compact the price history journal"""
+    folded = compact_price_history()
+    if folded:
+        print(f"[INFO] Compacted {folded} price history event(s)")
 
 def clear_price_history_all():
     """Clear all price history for all products"""
-    price_history = load_price_history()
-    # Clear all entries but keep the keys to maintain structure
-    for product_id in price_history:
-        price_history[product_id] = []
-    save_price_history(price_history)
+    with data_lock('price_history'):
+        _price_event_buffer.flush()
+        save_price_history({})
     return True
 
 def clear_price_history_individual(product_id):
     """Clear price history for a specific product"""
-    price_history = load_price_history()
-    if product_id in price_history:
-        price_history[product_id] = []
-        save_price_history(price_history)
-        return True
-    return False
+    if get_catalog().get(product_id) is None:
+        return False
+    if get_price_history(product_id):
+        append_price_events([{'op': 'clear', 'product_id': product_id}])
+    return True
+
+# Price history retention: daily points for 90 days, weekly points for a year, monthly points after that
+RETENTION_DAILY_DAYS = 90
+RETENTION_WEEKLY_DAYS = 365
+
+def _retention_bucket(entry, now):
+    """Return the bucket an entry is downsampled into (only the latest entry of a bucket is kept)"""
+    date = str(entry.get('date', ''))
+    try:
+        day = datetime.strptime(date[:10], '%Y-%m-%d')
+    except ValueError:
+        # Unparseable dates are left alone
+        return ('raw', date, id(entry))
+    age = (now - day).days
+    if age < RETENTION_DAILY_DAYS:
+        return ('day', date[:10])
+    if age < RETENTION_WEEKLY_DAYS:
+        year, week, _ = day.isocalendar()
+        return ('week', year, week)
+    return ('month', date[:7])
+
+def downsample_price_series(entries, now=None):
+    """Thin one product's history to the retention tiers, keeping entries in date order"""
+    now = now or datetime.now()
+    latest = {}
+    for entry in sorted(entries, key=lambda e: str(e.get('date', ''))):
+        latest[_retention_bucket(entry, now)] = entry
+    return sorted(latest.values(), key=lambda e: str(e.get('date', '')))
+
+def apply_price_retention(history, product_ids, now=None):
+    """Return (history, removed_points, removed_series) with orphaned/empty series dropped and the rest downsampled"""
+    retained = {}
+    removed_points = removed_series = 0
+    for product_id, entries in history.items():
+        if product_id not in product_ids or not entries:
+            removed_series += 1
+            removed_points += len(entries)
+            continue
+        kept = downsample_price_series(entries, now)
+        removed_points += len(entries) - len(kept)
+        retained[product_id] = kept
+    return retained, removed_points, removed_series
+
+def enforce_price_retention():
+    """Apply the retention policy to the stored price history; returns (removed_points, removed_series)"""
+    with data_lock('price_history'):
+        _price_event_buffer.flush()
+        # Read under the lock: a product's first price event is always written after the product itself
+        product_ids = get_catalog().positions
+        history, removed_points, removed_series = apply_price_retention(_current_price_history(), product_ids)
+        if removed_points or removed_series:
+            save_price_history(history)
+    return removed_points, removed_series
+
+def price_retention_job():
+    """Scheduled job: downsample old price history and drop orphaned series"""
+    removed_points, removed_series = enforce_price_retention()
+    if removed_points or removed_series:
+        print(f"[INFO] Price history retention removed {removed_points} point(s) and {removed_series} series")
 
 def record_daily_price(products):
-    """Automatically record today's price as history for each product"""
-    price_history = load_price_history()
+    """Record today's price as history for each product, writing only if something was recorded"""
     today = datetime.now().strftime('%Y-%m-%d')
-    
-    for product in products:
-        product_id = product['id']
-        current_price = product['price']
-        
-        # Initialize if not exists
-        if product_id not in price_history:
-            price_history[product_id] = []
-        
-        # Check if price already recorded for today
-        today_recorded = False
-        if price_history[product_id]:
-            last_entry = price_history[product_id][-1]
-            last_date = last_entry.get('date', '')[:10]  # Get YYYY-MM-DD
-            if last_date == today:
-                today_recorded = True
-        
-        # If not recorded for today, record current price
-        if not today_recorded:
-            price_history[product_id].append({
-                'date': datetime.now().isoformat(),
-                'price': current_price
-            })
+    events = []
+    
+    # Locked so that several workers running the daily job record each product only once
+    with data_lock('price_history'):
+        price_history = _current_price_history()
+        for product in products:
+            product_id = product['id']
+            history = price_history.get(product_id)
             
-            # Keep last 365 days of history (1 year)
-            if len(price_history[product_id]) > 365:
-                price_history[product_id] = price_history[product_id][-365:]
-    
-    save_price_history(price_history)
+            # Check if price already recorded for today
+            if history and str(history[-1].get('date', ''))[:10] == today:  # Compare YYYY-MM-DD
+                continue
+            
+            # Not recorded for today: record current price (old points are thinned by the retention job)
+            events.append(price_event(product_id, product['price']))
+        
+        append_price_events(events)
+        _price_event_buffer.flush()
+    return len(events)
+
+def record_daily_prices_job():
+    """Scheduled job: take today's price snapshot for the whole catalog"""
+    recorded = record_daily_price(get_catalog().products)
+    if recorded:
+        print(f"[INFO] Recorded daily price for {recorded} product(s)")
+
+# Background jobs
+_background_jobs = []
+_background_state = {'started': False}
+_background_lock = threading.Lock()
+
+def schedule_job(name, interval, func):
+    """Register func to run on the background thread every `interval` seconds"""
+    _background_jobs.append({'name': name, 'interval': interval, 'func': func, 'next_run': 0})
+
+def _run_background_jobs():
+    while True:
+        for job in _background_jobs:
+            if job['next_run'] <= time.time():
+                try:
+                    job['func']()
+                except Exception as e:
+                    print(f"[WARNING] Background job {job['name']} failed: {e}")
+                job['next_run'] = time.time() + job['interval']
+        next_run = min((job['next_run'] for job in _background_jobs), default=time.time() + 60)
+        time.sleep(min(60, max(1, next_run - time.time())))
+
+def start_background_jobs():
+    """Start the background job thread once per process"""
+    if _background_state['started'] or not app.config['BACKGROUND_JOBS']:
+        return
+    with _background_lock:
+        if not _background_state['started']:
+            _background_state['started'] = True
+            threading.Thread(target=_run_background_jobs, name='background-jobs', daemon=True).start()
+
+# The daily snapshot is idempotent per day, so checking hourly is enough to catch the date change
+schedule_job('record_daily_prices', 3600, record_daily_prices_job)
+schedule_job('compact_price_history', 600, compact_price_history_job)
+schedule_job('price_retention', 6 * 3600, price_retention_job)
+schedule_job('sync_product_changes', 3600, sync_product_changes_job)
+schedule_job('compact_product_changes', 3600, compact_product_changes_job)
 
 # Currency exchange rates (INR as base)
 EXCHANGE_RATES = {
@@ -239,6 +1843,10 @@ def get_currency_symbol(currency='INR'):
     """Get currency symbol"""
     return CURRENCY_SYMBOLS.get(currency, currency)
 
+# The rate table only changes with the code, so its URL carries a content hash and is cached for good
+CURRENCY_RATES_VERSION = hashlib.sha1(json.dumps([EXCHANGE_RATES, CURRENCY_SYMBOLS], sort_keys=True).encode()).hexdigest()[:12]
+MAX_BATCH_AMOUNTS = 1000
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
 
@@ -248,10 +1856,11 @@ def is_valid_hex_color(color):
     return bool(re.match(r'^#([A-Fa-f0-9]{6}|[A-Fa-f0-9]{3})$', color))
 
 # Volta Chatbot Configuration Functions
-def load_volta_config():
-    """Load Volta chatbot configuration"""
+VOLTA_CONFIG_FILE = 'data/volta_config.json'
+
+def _read_volta_config():
     try:
-        with open('data/volta_config.json', 'r') as f:
+        with open(VOLTA_CONFIG_FILE, 'r') as f:
             return json.load(f)
     except (FileNotFoundError, json.JSONDecodeError):
         # Create default config
@@ -282,10 +1891,46 @@ Always provide relevant examples when possible."""
         save_volta_config(default_config)
         return default_config
 
+class VoltaConfig:
+    """Read-only snapshot of volta_config.json with cheap typed accessors"""
+    def __init__(self, data):
+        self.data = MappingProxyType(data)
+        self.maintenance_mode = bool(data.get('maintenance_mode', False))
+        self.enabled = bool(data.get('enabled', False))
+        self.api_key = str(data.get('api_key', '') or '').strip()
+        # Only non-sensitive config data is exposed to templates
+        self.public = MappingProxyType({
+            'version': data.get('version', '2.0.0'),
+            'ascii_art_enabled': data.get('ascii_art_enabled', False),
+            'ascii_art': data.get('ascii_art', ''),
+            'ascii_art_light_color': data.get('ascii_art_light_color', '#ff2600'),
+            'ascii_art_dark_color': data.get('ascii_art_dark_color', '#4f9ff0'),
+        })
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+_volta_config_cache = VersionedCache(
+    'config',
+    lambda version: VoltaConfig(_read_volta_config()),
+    lambda: _file_signature(VOLTA_CONFIG_FILE),
+    lambda: _file_mtime(VOLTA_CONFIG_FILE))
+
+def get_volta_config():
+    """Return the cached Volta configuration snapshot"""
+    return _volta_config_cache.get()
+
+def load_volta_config():
+    """Load Volta chatbot configuration (a mutable copy)"""
+    return dict(get_volta_config().data)
+
 def save_volta_config(config):
     """Save Volta chatbot configuration"""
-    with open('data/volta_config.json', 'w') as f:
-        json.dump(config, f, indent=4)
+    _atomic_write_json(VOLTA_CONFIG_FILE, config, indent=4)
+    _volta_config_cache.invalidate()
 
 def get_volta_api_key():
     """Get Volta API key from .env file or config - returns first available key"""
@@ -318,8 +1963,7 @@ def get_volta_api_keys():
     
     # Then check if saved in volta config
     try:
-        config = load_volta_config()
-        config_key = config.get('api_key', '').strip()
+        config_key = get_volta_config().api_key
         if config_key and config_key not in api_keys:
             api_keys.append(config_key)
     except:
@@ -376,9 +2020,10 @@ def call_gemini_with_failover(api_keys, safe_prompt, config):
 
 def save_api_key_to_config(api_key):
     """Save API key to volta config"""
-    config = load_volta_config()
-    config['api_key'] = api_key.strip()
-    save_volta_config(config)
+    with data_lock('config'):
+        config = load_volta_config()
+        config['api_key'] = api_key.strip()
+        save_volta_config(config)
     
     # Also update .env file for persistence
     try:
@@ -485,77 +2130,67 @@ def process_csv_file(filepath):
         # Convert quantity to int
         df['quantity'] = pd.to_numeric(df['quantity'], errors='coerce').fillna(0).astype(int)
         
-        products = load_products()
-        price_history = load_price_history()
+        with data_lock('products'):
+            catalog = get_catalog()
+            products = load_products(catalog)
+            price_events = []
         
-        existing_products = {p['name']: p for p in products}
-        updated_count = 0
-        created_count = 0
+            updated_count = 0
+            created_count = 0
         
-        for _, row in df.iterrows():
-            product_name = str(row['name']).strip()
-            if not product_name or product_name.lower() in ['nan', '']:
-                continue
-                
-            # Check if product exists
-            if product_name in existing_products:
-                product = existing_products[product_name]
-                old_price = product['price']
-                new_price = float(row['price'])
+            for _, row in df.iterrows():
+                product_name = str(row['name']).strip()
+                if not product_name or product_name.lower() in ['nan', '']:
+                    continue
                 
-                # Update product
-                product.update({
-                    'name': product_name,
-                    'price': new_price,
-                    'quantity': int(row['quantity']),
-                    'availability': row['availability'],
-                    'description': row['description'],
-                    'type': row.get('type', ''),
-                    'last_updated': datetime.now().isoformat()
-                })
+                # Check if product exists
+                existing_id = catalog.find_by_name(product_name)
+                if existing_id is not None:
+                    product = products[catalog.positions[existing_id]]
+                    old_price = product['price']
+                    new_price = float(row['price'])
                 
-                # Update price history if price changed
-                if old_price != new_price:
-                    if product['id'] not in price_history:
-                        price_history[product['id']] = []
-                    
-                    price_history[product['id']].append({
-                        'date': datetime.now().isoformat(),
-                        'price': old_price
+                    # Update product
+                    product.update({
+                        'name': product_name,
+                        'price': new_price,
+                        'quantity': int(row['quantity']),
+                        'availability': row['availability'],
+                        'description': row['description'],
+                        'type': row.get('type', ''),
+                        'last_updated': datetime.now().isoformat()
                     })
-                    
-                    # Keep only last 20 price entries
-                    if len(price_history[product['id']]) > 20:
-                        price_history[product['id']] = price_history[product['id']][-20:]
                 
-                updated_count += 1
-            else:
-                # Create new product
-                new_product = {
-                    'id': str(uuid.uuid4()),
-                    'name': product_name,
-                    'price': float(row['price']),
-                    'quantity': int(row['quantity']),
-                    'availability': row['availability'],
-                    'type': row.get('type', ''),
-                    'description': row['description'],
-                    'image': 'default.jpg',
-                    'index': len(products),  # Add index for new products
-                    'created_at': datetime.now().isoformat(),
-                    'last_updated': datetime.now().isoformat()
-                }
-                products.append(new_product)
+                    # Update price history if price changed
+                    if old_price != new_price:
+                        price_events.append(price_event(product['id'], old_price))
+                
+                    updated_count += 1
+                else:
+                    # Create new product
+                    new_product = {
+                        'id': str(uuid.uuid4()),
+                        'name': product_name,
+                        'price': float(row['price']),
+                        'quantity': int(row['quantity']),
+                        'availability': row['availability'],
+                        'type': row.get('type', ''),
+                        'description': row['description'],
+                        'image': 'default.jpg',
+                        'index': len(products),  # Add index for new products
+                        'created_at': datetime.now().isoformat(),
+                        'last_updated': datetime.now().isoformat()
+                    }
+                    products.append(new_product)
                 
-                # Initialize price history
-                price_history[new_product['id']] = [{
-                    'date': datetime.now().isoformat(),
-                    'price': float(row['price'])
-                }]
+                    # Initialize price history
+                    price_events.append(price_event(new_product['id'], float(row['price'])))
                 
-                created_count += 1
+                    created_count += 1
         
-        save_products(products)
-        save_price_history(price_history)
+            save_products(products)
+            append_price_events(price_events)
+            graph_renderer.prewarm(event['product_id'] for event in price_events)
         
         message = f"CSV processed successfully. Created: {created_count}, Updated: {updated_count}"
         return True, message
@@ -567,14 +2202,18 @@ def process_csv_file(filepath):
         print(f"Error details: {error_details}")
         return False, f"Error processing CSV: {str(e)}"
 
-def generate_price_graph(product_id):
-    """Generate price history graph for a product"""
-    price_history = load_price_history()
+# Price graph rendering and cache
+GRAPH_CACHE_DIR = 'data/graph_cache'
+# Part of every cache key: bump when the graph's appearance changes so old renders are not reused
+GRAPH_RENDER_VERSION = 2
+
+def price_graph_series(product_id):
+    """Return (dates, prices) to plot for a product, or None when there are fewer than 2 points"""
+    history = get_price_history(product_id)
     
-    if product_id not in price_history or len(price_history[product_id]) == 0:
+    if len(history) == 0:
         return None
     
-    history = price_history[product_id]
     dates = []
     prices = []
     
@@ -588,8 +2227,7 @@ def generate_price_graph(product_id):
             continue
     
     # Add current price with today's date
-    products = load_products()
-    current_product = next((p for p in products if p['id'] == product_id), None)
+    current_product = get_catalog().get(product_id)
     if current_product:
         current_date = datetime.now().strftime('%Y-%m-%d')
         # Only add current price if it's different from last date or if we need more data
@@ -600,176 +2238,464 @@ def generate_price_graph(product_id):
     # Need at least 2 points to draw a meaningful graph
     if len(dates) < 2:
         return None
-    
-    # Create figure with better size and formatting
-    plt.figure(figsize=(12, 6))
+    return dates, prices
+
+def price_graph_key(product_id, dates, prices):
+    """Cache key of a graph: changes whenever the history, the current price or the date changes what is plotted"""
+    return hashlib.sha1(json.dumps([GRAPH_RENDER_VERSION, product_id, dates, prices]).encode()).hexdigest()[:20]
+
+GRAPH_FORMATS = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+def render_price_graph(dates, prices, fmt='png'):
+    """Render the price history graph as PNG or SVG bytes
+
+    Each call works on its own figure (or string), so renders from concurrent threads do not interfere.
+    """
+    if fmt == 'svg':
+        return _render_price_graph_svg(dates, prices)
+    return _render_price_graph_png(dates, prices)
+
+def _format_inr(value):
+    """Format a price as rupees, with decimals only when it has them"""
+    if value == int(value):
+        return f'₹{int(value):,}'
+    return f'₹{value:,.2f}'
+
+def _price_axis_limits(prices):
+    """y-axis limits: the price range with 15% padding, starting no lower than 0"""
+    min_price = min(prices)
+    max_price = max(prices)
+    price_range = max_price - min_price
+    if price_range > 0:
+        padding = price_range * 0.15
+    else:
+        padding = max_price * 0.15 if max_price > 0 else 100
+    return max(0, min_price - padding), max_price + padding
+
+def _render_price_graph_png(dates, prices):
+    # Object-oriented API: no pyplot figure registry or "current axes" shared between threads
+    fig = Figure(figsize=(12, 6))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
     
     # Plot the line
-    plt.plot(dates, prices, marker='o', linewidth=2.5, markersize=8, 
-             color='#2563eb', markerfacecolor='#1e40af', markeredgewidth=2, markeredgecolor='#2563eb')
+    ax.plot(dates, prices, marker='o', linewidth=2.5, markersize=8, 
+            color='#2563eb', markerfacecolor='#1e40af', markeredgewidth=2, markeredgecolor='#2563eb')
     
     # Fill area under the curve
-    plt.fill_between(range(len(dates)), prices, alpha=0.2, color='#2563eb')
+    ax.fill_between(range(len(dates)), prices, alpha=0.2, color='#2563eb')
     
     # Formatting
-    plt.title('Price History (INR)', fontsize=18, fontweight='bold', pad=20)
-    plt.xlabel('Date', fontsize=13, fontweight='bold')
-    plt.ylabel('Price (₹)', fontsize=13, fontweight='bold')
+    ax.set_title('Price History (INR)', fontsize=18, fontweight='bold', pad=20)
+    ax.set_xlabel('Date', fontsize=13, fontweight='bold')
+    ax.set_ylabel('Price (₹)', fontsize=13, fontweight='bold')
     
     # Format y-axis to show prices with decimal values
-    ax = plt.gca()
-    def format_price(x, p):
-        if x == int(x):
-            return f'₹{int(x):,}'
-        else:
-            return f'₹{x:,.2f}'
-    ax.yaxis.set_major_formatter(plt.FuncFormatter(format_price))
+    ax.yaxis.set_major_formatter(FuncFormatter(lambda x, p: _format_inr(x)))
     
     # Rotate x-axis labels
-    plt.xticks(rotation=45, ha='right')
+    for label in ax.get_xticklabels():
+        label.set_rotation(45)
+        label.set_horizontalalignment('right')
     
     # Add grid
-    plt.grid(True, alpha=0.3, linestyle='--', linewidth=0.7)
+    ax.grid(True, alpha=0.3, linestyle='--', linewidth=0.7)
     
-    # Add value labels on each point - show decimal values properly
-    for i, (date, price) in enumerate(zip(dates, prices)):
-        # Format price with decimals if needed
-        if price == int(price):
-            price_label = f'₹{int(price):,}'
-        else:
-            price_label = f'₹{price:,.2f}'
-        
-        ax.text(i, price, price_label, ha='center', va='bottom', fontsize=10, fontweight='bold', color='#1e40af')
+    # Add value labels on each point
+    for i, price in enumerate(prices):
+        ax.text(i, price, _format_inr(price), ha='center', va='bottom', fontsize=10, fontweight='bold', color='#1e40af')
     
-    # Set y-axis to start from a reasonable minimum
-    min_price = min(prices)
-    max_price = max(prices)
-    price_range = max_price - min_price
-    if price_range > 0:
-        padding = price_range * 0.15
-    else:
-        padding = max_price * 0.15 if max_price > 0 else 100
-    plt.ylim(max(0, min_price - padding), max_price + padding)
+    ax.set_ylim(*_price_axis_limits(prices))
     
     # Adjust layout to prevent label cutoff
-    plt.tight_layout()
+    fig.tight_layout()
     
-    # Save to bytes
     img_bytes = io.BytesIO()
-    plt.savefig(img_bytes, format='png', dpi=100, facecolor='white', bbox_inches='tight')
-    plt.close()
-    img_bytes.seek(0)
+    fig.savefig(img_bytes, format='png', dpi=100, facecolor='white', bbox_inches='tight')
+    return img_bytes.getvalue()
+
+# Direct SVG layout, in viewBox units
+SVG_WIDTH, SVG_HEIGHT = 1200, 600
+SVG_MARGINS = (110, 30, 70, 110)  # left, right, top, bottom
+SVG_MAX_LABELS = 30
+
+def _nice_ticks(low, high, count=6):
+    """Round tick values (steps of 1, 2, 2.5 or 5 times a power of ten) covering low..high"""
+    span = high - low
+    if span <= 0:
+        return [low]
+    raw_step = span / count
+    magnitude = 10 ** math.floor(math.log10(raw_step))
+    step = next(m * magnitude for m in (1, 2, 2.5, 5, 10) if m * magnitude >= raw_step)
+    first = math.ceil(low / step)
+    last = math.floor(high / step)
+    return [round(i * step, 10) for i in range(first, last + 1)]
+
+def _render_price_graph_svg(dates, prices):
+    """Line chart drawn straight to SVG markup, without matplotlib"""
+    left, right, top, bottom = SVG_MARGINS
+    plot_width = SVG_WIDTH - left - right
+    plot_height = SVG_HEIGHT - top - bottom
+    low, high = _price_axis_limits(prices)
+    count = len(prices)
+    
+    def x_at(i):
+        # 5% inset on both sides, like matplotlib's default axis margins
+        return left + plot_width * (0.05 + 0.9 * i / (count - 1))
+    
+    def y_at(price):
+        return top + plot_height * (1 - (price - low) / (high - low))
+    
+    points = [(x_at(i), y_at(p)) for i, p in enumerate(prices)]
+    line = ' '.join(f'{x:.1f},{y:.1f}' for x, y in points)
+    baseline = y_at(max(low, 0))
+    # Long series only label every n-th point so the text does not overlap
+    label_every = max(1, math.ceil(count / SVG_MAX_LABELS))
+    
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {SVG_WIDTH} {SVG_HEIGHT}" '
+        f'font-family="DejaVu Sans, Arial, sans-serif">',
+        f'<rect width="{SVG_WIDTH}" height="{SVG_HEIGHT}" fill="white"/>',
+        f'<text x="{left + plot_width / 2:.1f}" y="40" text-anchor="middle" font-size="22" font-weight="bold">Price History (INR)</text>',
+    ]
+    
+    # Grid and y-axis labels
+    for tick in _nice_ticks(low, high):
+        y = y_at(tick)
+        parts.append(f'<line x1="{left}" y1="{y:.1f}" x2="{left + plot_width}" y2="{y:.1f}" '
+                     f'stroke="#000" stroke-opacity="0.3" stroke-dasharray="4 3" stroke-width="0.7"/>')
+        parts.append(f'<text x="{left - 8}" y="{y + 4:.1f}" text-anchor="end" font-size="12">{escape(_format_inr(tick))}</text>')
     
-    # Encode to base64
-    img_base64 = base64.b64encode(img_bytes.getvalue()).decode('utf-8')
-    return f"data:image/png;base64,{img_base64}"
+    # x-axis grid, date labels and value labels
+    for i, ((x, y), date, price) in enumerate(zip(points, dates, prices)):
+        if i % label_every and i != count - 1:
+            continue
+        axis_y = top + plot_height
+        parts.append(f'<line x1="{x:.1f}" y1="{top}" x2="{x:.1f}" y2="{axis_y}" '
+                     f'stroke="#000" stroke-opacity="0.3" stroke-dasharray="4 3" stroke-width="0.7"/>')
+        parts.append(f'<text x="{x:.1f}" y="{axis_y + 16}" text-anchor="end" font-size="12" '
+                     f'transform="rotate(-45 {x:.1f} {axis_y + 16})">{escape(date)}</text>')
+        parts.append(f'<text x="{x:.1f}" y="{y - 10:.1f}" text-anchor="middle" font-size="12" font-weight="bold" '
+                     f'fill="#1e40af">{escape(_format_inr(price))}</text>')
+    
+    # Area, line and markers
+    parts.append(f'<polygon points="{points[0][0]:.1f},{baseline:.1f} {line} {points[-1][0]:.1f},{baseline:.1f}" '
+                 f'fill="#2563eb" fill-opacity="0.2"/>')
+    parts.append(f'<polyline points="{line}" fill="none" stroke="#2563eb" stroke-width="3" stroke-linejoin="round"/>')
+    parts.extend(f'<circle cx="{x:.1f}" cy="{y:.1f}" r="5" fill="#1e40af" stroke="#2563eb" stroke-width="2"/>'
+                 for x, y in points)
+    
+    # Axes frame and titles
+    parts.append(f'<rect x="{left}" y="{top}" width="{plot_width}" height="{plot_height}" fill="none" stroke="#000" stroke-width="0.8"/>')
+    parts.append(f'<text x="{left + plot_width / 2:.1f}" y="{SVG_HEIGHT - 12}" text-anchor="middle" font-size="15" font-weight="bold">Date</text>')
+    parts.append(f'<text x="22" y="{top + plot_height / 2:.1f}" text-anchor="middle" font-size="15" font-weight="bold" '
+                 f'transform="rotate(-90 22 {top + plot_height / 2:.1f})">Price (₹)</text>')
+    parts.append('</svg>')
+    return '\n'.join(parts).encode('utf-8')
+
+class GraphCache:
+    """Rendered price graphs, in an in-memory LRU and in files shared by all workers
+
+    Keys come from price_graph_key(), so a changed history or price yields a new key. Files live
+    in one directory per product. Superseded renders are not deleted when a new one is stored,
+    because a slow render of an older history can finish after a newer one. Instead the least
+    recently used files (by mtime, refreshed on disk reads) are evicted once the cache holds
+    more than max_files.
+    """
+    def __init__(self, directory, max_items=128, max_files=1000):
+        self.directory = directory
+        self.max_files = max_files
+        self._memory = TTLCache(maxsize=max_items, ttl=24 * 3600)
+
+    def _path(self, product_id, key, fmt):
+        return os.path.join(self.directory, secure_filename(product_id) or '_', f'{key}.{fmt}')
+
+    def contains(self, product_id, key, fmt):
+        return self._memory.get((key, fmt)) is not None or os.path.exists(self._path(product_id, key, fmt))
+
+    def get(self, product_id, key, fmt):
+        """Return the cached render or None"""
+        data = self._memory.get((key, fmt))
+        if data is None:
+            path = self._path(product_id, key, fmt)
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+                os.utime(path)
+            except OSError:
+                return None
+            self._memory.set((key, fmt), data)
+        return data
+
+    def put(self, product_id, key, fmt, data):
+        self._memory.set((key, fmt), data)
+        path = self._path(product_id, key, fmt)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _atomic_write(path, lambda f: f.write(data), mode='wb')
+        self._prune()
+
+    def _prune(self):
+        files = []
+        for product_dir in os.scandir(self.directory):
+            if product_dir.is_dir():
+                files.extend(entry for entry in os.scandir(product_dir.path) if entry.is_file())
+        if len(files) > self.max_files:
+            files.sort(key=lambda e: e.stat().st_mtime)
+            for entry in files[:len(files) - self.max_files]:
+                _remove_quietly(entry.path)
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+graph_cache = GraphCache(GRAPH_CACHE_DIR)
+
+# PNG rendering is CPU-bound and holds the GIL, so it runs in worker processes (0 renders inline)
+GRAPH_RENDER_WORKERS = int(os.getenv('GRAPH_RENDER_WORKERS', '2'))
+MAX_PENDING_GRAPH_RENDERS = 64
+GRAPH_RENDER_TIMEOUT = 30
+# Pre-warming waits for the price event buffer to be written first
+GRAPH_PREWARM_DELAY = 1.0
+
+class GraphRenderer:
+    """Renders PNG price graphs in a bounded process pool and stores them in the graph cache
+
+    The pool is started on first use with the spawn method, since forking a threaded server is
+    unsafe. At most max_pending renders are queued and requests for the same graph share one
+    render. SVGs are drawn directly, which is cheaper than a trip to the pool.
+    """
+    def __init__(self, cache, workers, max_pending):
+        self.cache = cache
+        self.workers = workers
+        self.max_pending = max_pending
+        self._pending = {}
+        self._prewarm_ids = set()
+        self._timer = None
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def submit(self, product_id, key, series, fmt='png', limit=None):
+        """Queue a render; returns its Future, or None if it is cached, not pooled or the queue is full"""
+        if not self.workers or fmt != 'png':
+            return None
+        job = (product_id, key, fmt)
+        with self._lock:
+            if job in self._pending:
+                return self._pending[job]
+            if len(self._pending) >= (limit or self.max_pending) or self.cache.contains(product_id, key, fmt):
+                return None
+            try:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                         mp_context=multiprocessing.get_context('spawn'))
+                future = self._executor.submit(render_price_graph, *series, fmt)
+            except RuntimeError as e:
+                # A crashed worker breaks the pool; the next submit starts a new one
+                print(f"[WARNING] Graph render pool unavailable: {e}")
+                self._executor = None
+                return None
+            self._pending[job] = future
+        future.add_done_callback(lambda f: self._finished(job, f))
+        return future
+
+    def _finished(self, job, future):
+        error = None if future.cancelled() else future.exception()
+        try:
+            if error is not None:
+                print(f"[WARNING] Price graph render for {job[0]} failed: {error}")
+            elif not future.cancelled():
+                self.cache.put(*job, future.result())
+        finally:
+            with self._lock:
+                self._pending.pop(job, None)
+                if isinstance(error, BrokenProcessPool):
+                    self._executor = None
+
+    def render(self, product_id, key, series, fmt='png'):
+        """Render and cache a graph, in the pool if it takes the job, otherwise in this thread"""
+        future = self.submit(product_id, key, series, fmt)
+        if future is not None:
+            try:
+                return future.result(timeout=GRAPH_RENDER_TIMEOUT)
+            except Exception as e:
+                print(f"[WARNING] Price graph render for {product_id} failed in the pool, rendering inline: {e}")
+        data = render_price_graph(*series, fmt)
+        self.cache.put(product_id, key, fmt, data)
+        return data
+
+    def prewarm(self, product_ids):
+        """Queue renders for products whose price just changed, so page views find them cached"""
+        if not self.workers:
+            return
+        with self._lock:
+            self._prewarm_ids.update(product_ids)
+            if self._timer is None:
+                self._timer = threading.Timer(GRAPH_PREWARM_DELAY, self._run_prewarm)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _run_prewarm(self):
+        with self._lock:
+            product_ids, self._prewarm_ids = self._prewarm_ids, set()
+            self._timer = None
+        try:
+            _price_event_buffer.flush()
+            # Pre-warming only uses half of the queue and waits for room; the rest is left to page views
+            limit = max(1, self.max_pending // 2)
+            for product_id in product_ids:
+                series = price_graph_series(product_id)
+                if series is None:
+                    continue
+                while True:
+                    with self._lock:
+                        running = [f for f in self._pending.values() if not f.done()]
+                    if len(running) < limit:
+                        break
+                    wait(running, return_when=FIRST_COMPLETED)
+                self.submit(product_id, price_graph_key(product_id, *series), series, limit=limit)
+        except Exception as e:
+            print(f"[WARNING] Price graph pre-warming failed: {e}")
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+graph_renderer = GraphRenderer(graph_cache, GRAPH_RENDER_WORKERS, MAX_PENDING_GRAPH_RENDERS)
+atexit.register(graph_renderer.shutdown)
+
+def cached_price_graph(product_id, key, series, fmt='png'):
+    """Return the rendered graph for a key from price_graph_key(), rendering only on a cache miss"""
+    data = graph_cache.get(product_id, key, fmt)
+    if data is None:
+        data = graph_renderer.render(product_id, key, series, fmt)
+    return data
+
+def price_graph_for_page(product_id):
+    """Return (graph URL, chart data) for the product page; (None, None) if there is nothing to plot
+
+    A rendered graph is linked by its versioned URL. Otherwise its render is queued and the page
+    gets the plotted {labels, prices} to draw a client-side chart meanwhile.
+    """
+    series = price_graph_series(product_id)
+    if series is None:
+        return None, None
+    key = price_graph_key(product_id, *series)
+    if graph_cache.contains(product_id, key, 'png') or graph_renderer.submit(product_id, key, series) is None:
+        # Rendered, or not queueable: the image request renders it
+        return url_for('product_price_graph', product_id=product_id, fmt='png', v=key), None
+    dates, prices = series
+    return None, {'labels': dates, 'prices': prices}
 
 # Routes
 @app.route('/')
 def home():
-    products = load_products()
-    # Record daily prices for all products
-    record_daily_price(products)
-    # Group by type for filtering
-    types = sorted(list(set(p.get('type', '') for p in products if p.get('type'))))
-    # Calculate total inventory value
-    total_value = sum(p['price'] * p['quantity'] for p in products)
-    return render_template('home.html', products=products, types=types, total_value=total_value)
+    catalog, catalog_tag, _ = _catalog_cache.get_versioned()
+    
+    def render():
+        facets = catalog.facets
+        pagination = catalog_page(catalog, page_args())
+        # Totals cover the whole catalog, not just this page
+        summary = catalog.summary
+        return render_template('home.html', products=pagination['products'], pagination=pagination, summary=summary,
+                               types=facets.types, total_value=summary['total_value'],
+                               type_counts=facets.type_counts(facets.all),
+                               availability_counts=facets.availability_counts(facets.all))
+    
+    return conditional_response(page_etag('home', catalog_tag), None, render, private=True)
 
 @app.route('/product/<product_id>')
 def product_detail(product_id):
-    products = load_products()
-    product = next((p for p in products if p['id'] == product_id), None)
+    catalog, catalog_tag, _ = _catalog_cache.get_versioned()
+    product = catalog.get(product_id)
     
     if not product:
         flash('Product not found', 'error')
         return redirect(url_for('home'))
     
-    # Record daily price for this product
-    record_daily_price([product])
-    
-    # Generate price graph
-    price_graph = generate_price_graph(product_id)
-    
-    # Load price history
-    price_history = load_price_history()
-    product_history = price_history.get(product_id, [])
-    
-    # Calculate average price from history
-    if product_history:
-        average_price = sum(h['price'] for h in product_history) / len(product_history)
-    else:
-        average_price = product['price']
-    
-    return render_template('product_detail.html', 
-                         product=product, 
-                         price_graph=price_graph,
-                         price_history=product_history,
-                         average_price=average_price)
+    # The price graph also plots today's price, so the page changes with the date
+    history_tag = price_history_version()[0]
+    # The graph is a separate, cacheable image request, or a client-side chart until it is rendered
+    price_graph, price_chart = price_graph_for_page(product_id)
+    
+    def render():
+        # Load price history
+        product_history = get_price_history(product_id)
+        
+        # Aggregates are kept per history version, so this does not rescan the history
+        price_stats = get_price_stats(product_id).summary(product['price'])
+        average_price = price_stats['average']
+        
+        return render_template('product_detail.html', 
+                             product=product, 
+                             price_graph=price_graph,
+                             price_chart=price_chart,
+                             price_history=product_history,
+                             price_stats=price_stats,
+                             average_price=average_price)
+    
+    etag = page_etag('product', catalog_tag, history_tag, datetime.now().strftime('%Y-%m-%d'), bool(price_graph))
+    return conditional_response(etag, None, render, private=True)
+
+@app.route('/product/<product_id>/price-graph.<fmt>')
+def product_price_graph(product_id, fmt):
+    if fmt not in GRAPH_FORMATS:
+        abort(404)
+    series = price_graph_series(product_id)
+    if series is None:
+        abort(404)
+    key = price_graph_key(product_id, *series)
+    
+    def build():
+        return app.response_class(cached_price_graph(product_id, key, series, fmt), mimetype=GRAPH_FORMATS[fmt])
+    
+    response = conditional_response(make_etag('price-graph', key, fmt), None, build)
+    # A URL carrying the current key never changes content; older keys fall back to revalidation
+    if request.args.get('v') == key:
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
 
 @app.route('/search')
 def search():
-    query = request.args.get('q', '').lower().strip()
-    min_price = request.args.get('min_price', type=float)
-    max_price = request.args.get('max_price', type=float)
-    availability = request.args.get('availability')
-    device_type = request.args.get('type')
-    
-    products = load_products()
-    types = sorted(list(set(p.get('type', '') for p in products if p.get('type'))))
-    
-    # Apply filters
-    filtered_products = products
-    
-    # Enhanced search with word matching
-    if query:
-        query_words = [w.strip() for w in query.split() if w.strip()]
-        filtered_by_search = []
-        
-        for p in filtered_products:
-            name_lower = p['name'].lower()
-            desc_lower = p['description'].lower()
-            type_lower = p.get('type', '').lower()
-            
-            # Combine all searchable fields
-            searchable = f"{name_lower} {desc_lower} {type_lower}"
-            
-            # Check if any query word matches
-            match_score = 0
-            for qword in query_words:
-                # Exact word match (highest priority)
-                if qword in [w.strip('.,!?;:') for w in searchable.split()]:
-                    match_score += 3
-                # Word beginning match
-                elif any(w.startswith(qword) for w in searchable.split()):
-                    match_score += 2
-                # Substring match
-                elif qword in searchable:
-                    match_score += 1
-            
-            if match_score > 0:
-                filtered_by_search.append((p, match_score))
-        
-        # Sort by match score (highest first)
-        filtered_by_search.sort(key=lambda x: x[1], reverse=True)
-        filtered_products = [p for p, _ in filtered_by_search]
+    catalog, catalog_tag, _ = _catalog_cache.get_versioned()
     
-    if min_price is not None:
-        filtered_products = [p for p in filtered_products if p['price'] >= min_price]
-    
-    if max_price is not None:
-        filtered_products = [p for p in filtered_products if p['price'] <= max_price]
-    
-    if availability and availability != 'all':
-        filtered_products = [p for p in filtered_products if p['availability'] == availability]
-    
-    if device_type and device_type != 'all':
-        filtered_products = [p for p in filtered_products if p.get('type') == device_type]
-    
-    # Calculate total inventory value for filtered products
-    total_value = sum(p['price'] * p['quantity'] for p in filtered_products)
+    def render():
+        query = request.args.get('q', '').lower().strip()
+        min_price = request.args.get('min_price', type=float)
+        max_price = request.args.get('max_price', type=float)
+        availability = request.args.get('availability')
+        device_type = request.args.get('type')
+        
+        facets = catalog.facets
+        
+        # Word matching (exact, prefix, substring, typo) ranked by BM25F through the catalog's search index
+        if query:
+            ranked = catalog.search_positions(query)
+            matched = _bitmap(ranked)
+        else:
+            ranked = None
+            matched = facets.all
+        
+        # Filters are bitmap intersections; each facet is counted with the other filters applied
+        base = matched & facets.price_range(min_price, max_price)
+        by_type = facets.filter(device_type=device_type)
+        by_availability = facets.filter(availability=availability)
+        selected = base & by_type & by_availability
+        type_counts = facets.type_counts(base & by_availability)
+        availability_counts = facets.availability_counts(base & by_type)
+        
+        pagination = catalog_page(catalog, page_args(default_sort='relevance' if query else 'index'),
+                                  selected=selected, ranked=ranked)
+        
+        # Totals cover every matching product, not just this page
+        summary = catalog_summary([catalog.products[pos] for pos in _bitmap_positions(selected)])
+        
+        return render_template('home.html', products=pagination['products'], pagination=pagination, summary=summary,
+                               search_query=query, types=facets.types, total_value=summary['total_value'],
+                               type_counts=type_counts, availability_counts=availability_counts)
     
-    return render_template('home.html', products=filtered_products, search_query=query, types=types, total_value=total_value)
+    return conditional_response(page_etag('search', catalog_tag), None, render, private=True)
 
 @app.route('/admin/login', methods=['GET', 'POST'])
 def admin_login():
@@ -780,7 +2706,7 @@ def admin_login():
         email = request.form.get('email')
         password = request.form.get('password')
         
-        admin_data = load_admin_data()
+        admin_data = get_admin_data()
         
         if email == admin_data['email'] and bcrypt.check_password_hash(admin_data['password'], password):
             user = AdminUser(email, email)
@@ -818,8 +2744,10 @@ def admin_settings():
             elif not new_email or '@' not in new_email:
                 flash('Please enter a valid email address!', 'danger')
             else:
-                admin_data['email'] = new_email
-                save_admin_data(admin_data)
+                with data_lock('admin'):
+                    admin_data = load_admin_data()
+                    admin_data['email'] = new_email
+                    save_admin_data(admin_data)
                 flash('Email updated successfully! Please login again with your new email.', 'success')
                 logout_user()
                 return redirect(url_for('admin_login'))
@@ -837,8 +2765,11 @@ def admin_settings():
             elif new_password != confirm_password:
                 flash('New passwords do not match!', 'danger')
             else:
-                admin_data['password'] = bcrypt.generate_password_hash(new_password).decode('utf-8')
-                save_admin_data(admin_data)
+                password_hash = bcrypt.generate_password_hash(new_password).decode('utf-8')
+                with data_lock('admin'):
+                    admin_data = load_admin_data()
+                    admin_data['password'] = password_hash
+                    save_admin_data(admin_data)
                 flash('Password updated successfully!', 'success')
         
         return redirect(url_for('admin_settings'))
@@ -848,11 +2779,9 @@ def admin_settings():
 @app.route('/admin/dashboard')
 @login_required
 def admin_dashboard():
-    products = load_products()
-    # Record daily prices for all products
-    record_daily_price(products)
-    config = load_volta_config()
-    admin_data = load_admin_data()
+    products = get_catalog().products
+    config = get_volta_config().data
+    admin_data = get_admin_data()
     stats = {
         'total_products': len(products),
         'in_stock': sum(1 for p in products if p['availability'] == 'In Stock'),
@@ -868,18 +2797,19 @@ def admin_dashboard():
 @app.route('/admin/products')
 @login_required
 def admin_products():
-    products = load_products()
-    # Record daily prices for all products
-    record_daily_price(products)
-    return render_template('admin_products.html', products=products)
+    catalog = get_catalog()
+    # Search runs over the whole catalog through the search index, not just the rows of one page
+    query = request.args.get('q', '').lower().strip()
+    ranked = catalog.search_positions(query) if query else None
+    args = page_args(default_per_page=100, max_per_page=500, default_sort='relevance' if query else 'index')
+    pagination = catalog_page(catalog, args, selected=_bitmap(ranked) if query else None, ranked=ranked)
+    return render_template('admin_products.html', products=pagination['products'], pagination=pagination,
+                           search_query=query)
 
 @app.route('/admin/product/add', methods=['GET', 'POST'])
 @login_required
 def add_product():
     if request.method == 'POST':
-        products = load_products()
-        price_history = load_price_history()
-        
         new_product = {
             'id': str(uuid.uuid4()),
             'name': request.form.get('name'),
@@ -889,7 +2819,6 @@ def add_product():
             'type': request.form.get('type', ''),
             'description': request.form.get('description'),
             'image': 'default.jpg',
-            'index': len(products),  # Add index as the last position
             'created_at': datetime.now().isoformat(),
             'last_updated': datetime.now().isoformat()
         }
@@ -903,15 +2832,14 @@ def add_product():
                 file.save(filepath)
                 new_product['image'] = filename
         
-        products.append(new_product)
-        save_products(products)
+        with data_lock('products'):
+            products = load_products()
+            new_product['index'] = len(products)  # Add index as the last position
+            products.append(new_product)
+            save_products(products)
         
         # Initialize price history
-        price_history[new_product['id']] = [{
-            'date': datetime.now().isoformat(),
-            'price': new_product['price']
-        }]
-        save_price_history(price_history)
+        append_price_events([price_event(new_product['id'], new_product['price'])])
         
         flash('Product added successfully!', 'success')
         return redirect(url_for('admin_products'))
@@ -921,74 +2849,68 @@ def add_product():
 @app.route('/admin/product/edit/<product_id>', methods=['GET', 'POST'])
 @login_required
 def edit_product(product_id):
-    products = load_products()
-    product = next((p for p in products if p['id'] == product_id), None)
-    price_history = load_price_history()
-    
-    if not product:
+    if not get_catalog().get(product_id):
         flash('Product not found', 'error')
         return redirect(url_for('admin_products'))
     
     if request.method == 'POST':
-        old_price = product['price']
-        new_price = float(request.form.get('price', 0))
-        
-        # Update product
-        product.update({
-            'name': request.form.get('name'),
-            'price': new_price,
-            'quantity': int(request.form.get('quantity', 0)),
-            'availability': request.form.get('availability'),
-            'type': request.form.get('type', ''),
-            'description': request.form.get('description'),
-            'last_updated': datetime.now().isoformat()
-        })
-        
         # Handle image upload
+        image_filename = None
         if 'image' in request.files:
             file = request.files['image']
             if file and allowed_file(file.filename):
-                filename = secure_filename(f"{product_id}_{file.filename}")
-                filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+                image_filename = secure_filename(f"{product_id}_{file.filename}")
+                filepath = os.path.join(app.config['UPLOAD_FOLDER'], image_filename)
                 file.save(filepath)
-                product['image'] = filename
         
-        # Update price history if price changed
-        if old_price != new_price:
-            if product_id not in price_history:
-                price_history[product_id] = []
+        with data_lock('products'):
+            catalog = get_catalog()
+            products = load_products(catalog)
+            pos = catalog.positions.get(product_id)
+            if pos is None:
+                flash('Product not found', 'error')
+                return redirect(url_for('admin_products'))
+            product = products[pos]
+            old_price = product['price']
+            new_price = float(request.form.get('price', 0))
             
-            price_history[product_id].append({
-                'date': datetime.now().isoformat(),
-                'price': old_price
+            # Update product
+            product.update({
+                'name': request.form.get('name'),
+                'price': new_price,
+                'quantity': int(request.form.get('quantity', 0)),
+                'availability': request.form.get('availability'),
+                'type': request.form.get('type', ''),
+                'description': request.form.get('description'),
+                'last_updated': datetime.now().isoformat()
             })
+            if image_filename:
+                product['image'] = image_filename
             
-            # Keep only last 20 price entries
-            if len(price_history[product_id]) > 20:
-                price_history[product_id] = price_history[product_id][-20:]
-            
-            save_price_history(price_history)
+            save_products(products)
         
-        save_products(products)
+        # Update price history if price changed
+        if old_price != new_price:
+            append_price_events([price_event(product_id, old_price)])
+            graph_renderer.prewarm([product_id])
         flash('Product updated successfully!', 'success')
         return redirect(url_for('admin_products'))
     
-    return render_template('edit_product.html', product=product)
+    return render_template('edit_product.html', product=get_catalog().get(product_id))
 
 @app.route('/admin/product/delete/<product_id>', methods=['POST'])
 @login_required
 def delete_product(product_id):
-    products = load_products()
-    price_history = load_price_history()
-    
-    # Remove product
-    products = [p for p in products if p['id'] != product_id]
-    save_products(products)
+    with data_lock('products'):
+        products = load_products()
+        
+        # Remove product
+        products = [p for p in products if p['id'] != product_id]
+        save_products(products)
     
     # Remove price history
-    if product_id in price_history:
-        del price_history[product_id]
-        save_price_history(price_history)
+    if product_id in _current_price_history():
+        append_price_events([{'op': 'delete', 'product_id': product_id}])
     
     flash('Product deleted successfully!', 'success')
     return redirect(url_for('admin_products'))
@@ -1039,25 +2961,95 @@ def static_files(filename):
 
 @app.route('/api/products')
 def api_products():
-    products = load_products()
-    return jsonify(products)
+    catalog, catalog_tag, modified = _catalog_cache.get_versioned()
+    fields = [f.strip() for f in request.args.get('fields', '').split(',') if f.strip()]
+    columnar = request.args.get('format') == 'columnar'
+    
+    headers = {}
+    # Without paging parameters the whole catalog is returned, as before
+    if not any(arg in request.args for arg in ('page', 'per_page', 'sort', 'order')):
+        products = catalog.products
+    else:
+        pagination = catalog_page(catalog, page_args(default_per_page=50, max_per_page=500))
+        products = pagination['products']
+        headers['X-Total-Count'] = str(pagination['total'])
+        links = []
+        if pagination['page'] > 1:
+            links.append(f'<{page_url(pagination["page"] - 1)}>; rel="prev"')
+        if pagination['page'] < pagination['pages']:
+            links.append(f'<{page_url(pagination["page"] + 1)}>; rel="next"')
+        links.append(f'<{page_url(1)}>; rel="first"')
+        links.append(f'<{page_url(pagination["pages"])}>; rel="last"')
+        headers['Link'] = ', '.join(links)
+    
+    # The query string selects the page, fields and format, so it is part of the representation
+    etag = make_etag('api_products', catalog_tag, request.query_string)
+    return json_api_response(etag, modified, lambda: project_products(products, fields, columnar), headers)
+
+@app.route('/api/products/changes')
+def api_product_changes():
+    """Products created, updated or deleted since a change log version (since=0 for everything)"""
+    since = request.args.get('since', 0, type=int)
+    latest_version, changes = product_changes.changes_since(since)
+    # Read after the log: the catalog is at least as new as the entries being returned
+    catalog, catalog_tag, _ = _catalog_cache.get_versioned()
+    
+    def build_payload():
+        items = []
+        for product_id, entry in changes.items():
+            product = catalog.get(product_id)
+            if entry['op'] == 'delete' or product is None:
+                items.append({'op': 'delete', 'id': product_id, 'version': entry['version']})
+            else:
+                items.append({'op': 'upsert', 'id': product_id, 'version': entry['version'], 'product': dict(product)})
+        return {'since': since, 'version': latest_version, 'changes': items}
+    
+    return json_api_response(make_etag('changes', since, latest_version, catalog_tag), None, build_payload)
+
+def product_thumbnail_url(product):
+    """URL of a product's image, or the default device image"""
+    if product.get('image') and product['image'] != 'default.jpg':
+        return url_for('uploaded_file', filename=product['image'])
+    return url_for('static', filename='images/default-device.gif')
+
+@app.route('/api/search/suggest')
+def api_search_suggest():
+    """Search-as-you-type: a few matching products for a partially typed query"""
+    query = request.args.get('q', '').strip()
+    limit = min(max(request.args.get('limit', 8, type=int), 1), 20)
+    if not query:
+        return jsonify([])
+    return jsonify([{
+        'id': p['id'],
+        'name': p['name'],
+        'price': p['price'],
+        'thumbnail': product_thumbnail_url(p),
+        'url': url_for('product_detail', product_id=p['id'])
+    } for p in get_catalog().suggest(query, limit)])
 
 @app.route('/api/product/<product_id>')
 def api_product_detail(product_id):
-    products = load_products()
-    product = next((p for p in products if p['id'] == product_id), None)
+    catalog, catalog_tag, catalog_modified = _catalog_cache.get_versioned()
+    product = catalog.get(product_id)
     
     if product:
-        price_history = load_price_history()
-        product['price_history'] = price_history.get(product_id, [])
-        return jsonify(product)
+        def build():
+            data = dict(product)
+            data['price_history'] = get_price_history(product_id)
+            data['price_stats'] = get_price_stats(product_id).summary(product['price'])
+            return jsonify(data)
+        
+        history_tag, history_modified = price_history_version()
+        # The 7/30-day deltas move with the date
+        etag = make_etag('api_product', catalog_tag, history_tag, datetime.now().strftime('%Y-%m-%d'))
+        return conditional_response(etag, _latest(catalog_modified, history_modified), build)
     
     return jsonify({'error': 'Product not found'}), 404
 
 @app.route('/api/stats')
 @login_required
 def api_stats():
-    products = load_products()
+    products = get_catalog().products
     stats = {
         'total_products': len(products),
         'in_stock': sum(1 for p in products if p['availability'] == 'In Stock'),
@@ -1087,14 +3079,61 @@ def convert_currency_api():
         'symbol': symbol
     })
 
+@app.route('/api/convert-currency/batch', methods=['POST'])
+def convert_currency_batch_api():
+    """Convert many INR amounts to one currency in a single request"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'request body must be a JSON object'}), 400
+    amounts = data.get('amounts')
+    target_currency = data.get('currency', 'INR')
+    
+    if not isinstance(amounts, list) or len(amounts) > MAX_BATCH_AMOUNTS:
+        return jsonify({'error': f'amounts must be a list of at most {MAX_BATCH_AMOUNTS} numbers'}), 400
+    try:
+        amounts = [float(a) for a in amounts]
+    except (TypeError, ValueError):
+        return jsonify({'error': 'amounts must be numbers'}), 400
+    # float() also accepts 'nan' and 'inf', which would make the response invalid JSON
+    if not all(math.isfinite(a) for a in amounts):
+        return jsonify({'error': 'amounts must be finite numbers'}), 400
+    
+    converted = [convert_price(a, target_currency) for a in amounts]
+    # A huge finite amount times the rate can still overflow to inf
+    if not all(math.isfinite(c) for c in converted):
+        return jsonify({'error': 'amounts are too large to convert'}), 400
+    
+    return jsonify({
+        'original_currency': 'INR',
+        'target_currency': target_currency,
+        'symbol': get_currency_symbol(target_currency),
+        'rate': EXCHANGE_RATES.get(target_currency, 1.0),
+        'converted_amounts': converted
+    })
+
+@app.route('/api/currency-rates')
+def currency_rates():
+    """INR exchange rate table for converting prices in the browser"""
+    response = conditional_response(make_etag('currency-rates', CURRENCY_RATES_VERSION), None, lambda: jsonify({
+        'version': CURRENCY_RATES_VERSION,
+        'base': 'INR',
+        'rates': EXCHANGE_RATES,
+        'symbols': CURRENCY_SYMBOLS
+    }))
+    # Versioned URLs (?v=) never change content; the bare URL is revalidated via its ETag
+    if request.args.get('v') == CURRENCY_RATES_VERSION:
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
 @app.route('/api/currencies')
 def get_currencies():
     """Get list of available currencies"""
-    return jsonify({
+    # The rates are part of the code, so the build tag alone versions this response
+    return conditional_response(make_etag('currencies'), None, lambda: jsonify({
         'currencies': list(EXCHANGE_RATES.keys()),
         'symbols': CURRENCY_SYMBOLS,
         'rates': EXCHANGE_RATES
-    })
+    }))
 
 @app.route('/api/products/reorder', methods=['POST'])
 @login_required
@@ -1107,21 +3146,26 @@ def reorder_products():
         if not product_order:
             return jsonify({'error': 'No product order provided'}), 400
         
-        products = load_products()
+        with data_lock('products'):
+            products = load_products()
         
-        # Create a mapping of product ID to product
-        product_map = {p['id']: p for p in products}
+            # Create a mapping of product ID to product
+            product_map = {p['id']: p for p in products}
         
-        # Update the index for each product in the new order
-        for new_index, product_id in enumerate(product_order):
-            if product_id in product_map:
-                product_map[product_id]['index'] = new_index
+            # The order may cover a single page: the listed products are rearranged among
+            # the positions they already occupy and every other product stays where it is
+            listed = list(dict.fromkeys(pid for pid in product_order if pid in product_map))
+            listed_ids = set(listed)
+            slots = [pos for pos, p in enumerate(products) if p['id'] in listed_ids]
+            for pos, product_id in zip(slots, listed):
+                products[pos] = product_map[product_id]
         
-        # Reconstruct products list in the new order
-        products = [product_map[pid] for pid in product_order if pid in product_map]
+            # Keep the index field in step with the stored order
+            for new_index, product in enumerate(products):
+                product['index'] = new_index
         
-        # Save the updated products
-        save_products(products)
+            # Save the updated products
+            save_products(products)
         
         return jsonify({'success': True, 'message': 'Products reordered successfully'})
     except Exception as e:
@@ -1211,17 +3255,10 @@ Keep it to 150-250 words."""
 @app.route('/chat')
 def chat():
     """Volta chatbot interface - PUBLIC"""
-    config = load_volta_config()
+    config = get_volta_config()
     # Only pass necessary config to template, not sensitive data like system_prompt
-    safe_config = {
-        'enabled': config.get('enabled', False),
-        'ascii_art_enabled': config.get('ascii_art_enabled', False),
-        'ascii_art': config.get('ascii_art', ''),
-        'ascii_art_light_color': config.get('ascii_art_light_color', '#ff2600'),
-        'ascii_art_dark_color': config.get('ascii_art_dark_color', '#4f9ff0'),
-        'version': config.get('version', '2.0.0')
-    }
-    return render_template('volta_chat.html', chatbot_enabled=config['enabled'], config=safe_config)
+    safe_config = dict(config.public, enabled=config.enabled)
+    return render_template('volta_chat.html', chatbot_enabled=config.enabled, config=safe_config)
 
 def sanitize_user_input(user_input):
     """Sanitize user input to prevent prompt injection attacks"""
@@ -1273,10 +3310,10 @@ User Message: {user_message}"""
 def api_chat():
     """API endpoint for Volta chatbot - PUBLIC with multi-API key failover"""
     try:
-        config = load_volta_config()
+        config = get_volta_config()
         
         # Check if chatbot is enabled
-        if not config['enabled']:
+        if not config.enabled:
             return jsonify({
                 'success': False,
                 'error': 'Volta is sleeping. The chatbot is currently in maintenance mode.',
@@ -1354,8 +3391,10 @@ def volta_settings():
                 flash('✗ API Key cannot be empty!', 'danger')
         
         elif action == 'toggle_status':
-            config['enabled'] = not config['enabled']
-            save_volta_config(config)
+            with data_lock('config'):
+                config = load_volta_config()
+                config['enabled'] = not config['enabled']
+                save_volta_config(config)
             status = 'enabled' if config['enabled'] else 'disabled'
             flash(f'Volta is now {status}!', 'info')
         
@@ -1369,16 +3408,19 @@ def volta_settings():
             elif not is_valid_hex_color(dark_color):
                 flash('✗ Invalid dark mode color. Please enter a valid hex color.', 'danger')
             else:
-                config['ascii_art_light_color'] = light_color
-                config['ascii_art_dark_color'] = dark_color
-                save_volta_config(config)
+                with data_lock('config'):
+                    config = load_volta_config()
+                    config['ascii_art_light_color'] = light_color
+                    config['ascii_art_dark_color'] = dark_color
+                    save_volta_config(config)
                 flash('✓ ASCII art colors updated successfully!', 'success')
         
         elif action == 'reset_config':
-            default_config = load_volta_config()
-            default_config['enabled'] = False
-            default_config['api_key'] = ''
-            save_volta_config(default_config)
+            with data_lock('config'):
+                default_config = load_volta_config()
+                default_config['enabled'] = False
+                default_config['api_key'] = ''
+                save_volta_config(default_config)
             flash('Volta configuration reset. Chatbot is now sleeping.', 'warning')
         
         return redirect(url_for('volta_settings'))
@@ -1401,6 +3443,17 @@ def clear_all_price_history():
         flash(f'✗ Error clearing price history: {str(e)}', 'danger')
     return redirect(url_for('admin_dashboard'))
 
+@app.route('/admin/price-history/retention', methods=['POST'])
+@login_required
+def apply_price_history_retention():
+    """Downsample old price history and remove series of deleted products"""
+    try:
+        removed_points, removed_series = enforce_price_retention()
+        flash(f'✓ Price history pruned: {removed_points} point(s) and {removed_series} unused series removed', 'success')
+    except Exception as e:
+        flash(f'✗ Error pruning price history: {str(e)}', 'danger')
+    return redirect(url_for('admin_dashboard'))
+
 @app.route('/admin/price-history/clear/<product_id>', methods=['POST'])
 @login_required
 def clear_price_history(product_id):
@@ -1420,9 +3473,10 @@ def clear_price_history(product_id):
 def toggle_maintenance_mode():
     """Toggle maintenance mode for the entire website"""
     try:
-        config = load_volta_config()
-        config['maintenance_mode'] = not config['maintenance_mode']
-        save_volta_config(config)
+        with data_lock('config'):
+            config = load_volta_config()
+            config['maintenance_mode'] = not config['maintenance_mode']
+            save_volta_config(config)
         status = 'ON' if config['maintenance_mode'] else 'OFF'
         flash(f'✓ Maintenance mode turned {status}!', 'info')
     except Exception as e:
@@ -1440,9 +3494,10 @@ def update_version():
             flash('✗ Version cannot be empty', 'danger')
             return redirect(url_for('admin_dashboard'))
         
-        config = load_volta_config()
-        config['version'] = new_version
-        save_volta_config(config)
+        with data_lock('config'):
+            config = load_volta_config()
+            config['version'] = new_version
+            save_volta_config(config)
         flash(f'✓ Version updated to {new_version}!', 'success')
     except Exception as e:
         flash(f'✗ Error updating version: {str(e)}', 'danger')
@@ -1461,10 +3516,11 @@ def update_ascii_art():
             flash('✗ ASCII art cannot be empty if enabled', 'danger')
             return redirect(url_for('admin_dashboard'))
         
-        config = load_volta_config()
-        config['ascii_art'] = new_ascii_art
-        config['ascii_art_enabled'] = ascii_art_enabled
-        save_volta_config(config)
+        with data_lock('config'):
+            config = load_volta_config()
+            config['ascii_art'] = new_ascii_art
+            config['ascii_art_enabled'] = ascii_art_enabled
+            save_volta_config(config)
         
         status = "enabled" if ascii_art_enabled else "disabled"
         flash(f'✓ ASCII art updated and {status}!', 'success')
@@ -1477,9 +3533,10 @@ def update_ascii_art():
 def toggle_ascii_art():
     """Toggle ASCII art display"""
     try:
-        config = load_volta_config()
-        config['ascii_art_enabled'] = not config.get('ascii_art_enabled', False)
-        save_volta_config(config)
+        with data_lock('config'):
+            config = load_volta_config()
+            config['ascii_art_enabled'] = not config.get('ascii_art_enabled', False)
+            save_volta_config(config)
         
         status = "enabled" if config['ascii_art_enabled'] else "disabled"
         flash(f'✓ ASCII art {status}!', 'success')
@@ -1978,12 +4035,50 @@ def service_unavailable(error):
 @app.before_request
 def check_maintenance_mode():
     """Check if maintenance mode is enabled"""
-    config = load_volta_config()
-    if config.get('maintenance_mode', False):
+    if get_volta_config().maintenance_mode:
         # Allow admin to access dashboard during maintenance
         if not request.path.startswith('/admin') and not request.path.startswith('/static'):
             return render_template('maintenance.html'), 503
 
+@app.cli.command('record-daily-prices')
+def record_daily_prices_command():
+    """Record today's price for every product (for cron when BACKGROUND_JOBS=0)"""
+    record_daily_prices_job()
+
+@app.cli.command('prune-price-history')
+def prune_price_history_command():
+    """Apply the price history retention policy (daily 90 days, weekly 1 year, then monthly)"""
+    removed_points, removed_series = enforce_price_retention()
+    print(f'Removed {removed_points} price point(s) and {removed_series} unused series')
+
+@app.cli.command('compact-price-history')
+def compact_price_history_command():
+    """Fold the price history journal into data/price_history.json"""
+    print(f'Compacted {compact_price_history()} price history event(s)')
+
+# Storage import/export commands
+@app.cli.command('import-json')
+def import_json_command():
+    """Load data/products.json and data/price_history.json into the configured storage backend"""
+    storage = get_storage()
+    if not hasattr(storage, 'import_json'):
+        print('JSON storage backend in use: the JSON files are already the live data')
+        return
+    count = storage.import_json()
+    invalidate_catalog()
+    product_changes.sync()
+    print(f'Imported {count} products into {storage.name} storage')
+
+@app.cli.command('export-json')
+def export_json_command():
+    """Write the configured storage backend's contents to data/products.json and data/price_history.json"""
+    storage = get_storage()
+    if not hasattr(storage, 'export_json'):
+        print('JSON storage backend in use: the JSON files are already the live data')
+        return
+    count = storage.export_json()
+    print(f'Exported {count} products from {storage.name} storage')
+
 if __name__ == '__main__':
     # Initialize on first run
     if not os.path.exists('data/admin_password.json'):
@@ -84,7 +84,7 @@ function renderPriceChart(ctx, labels, prices) {
         data: {
             labels: labels,
             datasets: [{
-                label: 'Price ($)',
+                label: 'Price (₹)',
                 data: prices,
                 borderColor: '#2563eb',
                 backgroundColor: 'rgba(37, 99, 235, 0.1)',
@@ -113,7 +113,7 @@ function renderPriceChart(ctx, labels, prices) {
                     bodyColor: '#ffffff',
                     callbacks: {
                         label: function(context) {
-                            return `Price: $${context.parsed.y.toFixed(2)}`;
+                            return `Price: ₹${context.parsed.y.toFixed(2)}`;
                         }
                     }
                 }
@@ -135,7 +135,7 @@ function renderPriceChart(ctx, labels, prices) {
                     ticks: {
                         color: '#64748b',
                         callback: function(value) {
-                            return '$' + value.toFixed(2);
+                            return '₹' + value.toFixed(2);
                         }
                     }
                 }
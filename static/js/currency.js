@@ -61,6 +61,54 @@ function changeCurrency(currency, symbol) {
     showCurrencyNotification(currency, currencySymbol);
 }
 
+// Rate table (fetched once per page; the versioned URL is cached by the browser)
+let ratesPromise = null;
+
+function loadRates() {
+    if (!ratesPromise) {
+        ratesPromise = fetch(window.CURRENCY_RATES_URL || '/api/currency-rates')
+            .then(response => {
+                if (!response.ok) throw new Error(`HTTP ${response.status}`);
+                return response.json();
+            })
+            .catch(error => {
+                ratesPromise = null;
+                throw error;
+            });
+    }
+    return ratesPromise;
+}
+
+// Convert amounts with one batch request (used if the rate table cannot be loaded)
+function convertAmountsRemotely(amounts, targetCurrency) {
+    return fetch('/api/convert-currency/batch', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+            amounts: amounts,
+            currency: targetCurrency
+        })
+    })
+        .then(response => response.json())
+        .then(data => ({ symbol: data.symbol, amounts: data.converted_amounts }));
+}
+
+// Convert amounts with the rate table, like the server: unknown currencies keep the INR amount
+function convertAmounts(amounts, targetCurrency) {
+    return loadRates()
+        .then(table => {
+            const rate = table.rates[targetCurrency] !== undefined ? table.rates[targetCurrency] : 1;
+            const symbol = table.symbols[targetCurrency] || targetCurrency;
+            return {
+                symbol: symbol,
+                amounts: amounts.map(amount => Math.round(amount * rate * 100) / 100)
+            };
+        })
+        .catch(() => convertAmountsRemotely(amounts, targetCurrency));
+}
+
 // Convert all prices on the page
 function convertAllPrices(targetCurrency) {
     if (targetCurrency === 'INR') {
@@ -70,32 +118,26 @@ function convertAllPrices(targetCurrency) {
     }
 
     // Get all price elements
-    const priceElements = document.querySelectorAll('[data-price-inr]');
+    const priceElements = Array.from(document.querySelectorAll('[data-price-inr]'));
+    if (priceElements.length === 0) return;
 
     priceElements.forEach(element => {
-        const priceInr = parseFloat(element.getAttribute('data-price-inr'));
-        const originalText = element.getAttribute('data-original-text') || element.textContent;
-
         // Store original text if not already stored
         if (!element.getAttribute('data-original-text')) {
-            element.setAttribute('data-original-text', originalText);
+            element.setAttribute('data-original-text', element.textContent);
         }
+    });
 
-        // Convert price via API
-        fetch('/api/convert-currency', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify({
-                amount: priceInr,
-                currency: targetCurrency
-            })
-        })
-            .then(response => response.json())
-            .then(data => {
-                const symbol = data.symbol;
-                const converted = data.converted_amount;
+    const amounts = priceElements.map(element => parseFloat(element.getAttribute('data-price-inr')) || 0);
+
+    convertAmounts(amounts, targetCurrency)
+        .then(result => {
+            // Ignore results for a currency the user has already switched away from
+            if ((localStorage.getItem('selectedCurrency') || 'INR') !== targetCurrency) return;
+
+            priceElements.forEach((element, i) => {
+                const symbol = result.symbol;
+                const converted = result.amounts[i];
 
                 // Format the converted price WITHOUT the ₹ symbol
                 let formattedPrice;
@@ -110,11 +152,11 @@ function convertAllPrices(targetCurrency) {
                 // Update element - replace all content with new formatted price
                 element.textContent = formattedPrice;
                 element.setAttribute('data-converted-currency', targetCurrency);
-            })
-            .catch(error => {
-                console.error('Currency conversion error:', error);
             });
-    });
+        })
+        .catch(error => {
+            console.error('Currency conversion error:', error);
+        });
 }
 
 // Restore original prices
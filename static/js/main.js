@@ -43,6 +43,62 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 });
 
+// Search-as-you-type suggestions for the header search boxes
+function initSearchSuggestions() {
+    document.querySelectorAll('.header-search input[name="q"]').forEach(input => {
+        const form = input.closest('form');
+        const list = document.createElement('div');
+        list.className = 'search-suggestions';
+        form.appendChild(list);
+
+        let timer = null;
+        let lastQuery = '';
+
+        input.setAttribute('autocomplete', 'off');
+        input.addEventListener('input', () => {
+            clearTimeout(timer);
+            timer = setTimeout(() => {
+                const query = input.value.trim();
+                lastQuery = query;
+                if (!query) {
+                    list.innerHTML = '';
+                    return;
+                }
+                fetch(`/api/search/suggest?q=${encodeURIComponent(query)}&limit=6`)
+                    .then(response => response.json())
+                    .then(items => {
+                        // Ignore responses for queries the user has already typed past
+                        if (query !== lastQuery) return;
+                        list.innerHTML = '';
+                        items.forEach(item => {
+                            const link = document.createElement('a');
+                            link.href = item.url;
+                            link.className = 'search-suggestion';
+                            const img = document.createElement('img');
+                            img.src = item.thumbnail;
+                            img.alt = '';
+                            const name = document.createElement('span');
+                            name.textContent = item.name;
+                            const price = document.createElement('small');
+                            price.setAttribute('data-price-inr', item.price);
+                            price.textContent = `₹${item.price}`;
+                            link.append(img, name, price);
+                            list.appendChild(link);
+                        });
+                    })
+                    .catch(() => { list.innerHTML = ''; });
+            }, 120);
+        });
+
+        input.addEventListener('blur', () => {
+            // Let a click on a suggestion land before hiding the list
+            setTimeout(() => { list.innerHTML = ''; }, 200);
+        });
+    });
+}
+
+document.addEventListener('DOMContentLoaded', initSearchSuggestions);
+
 function showNotification(message, type = 'info') {
     // Create notification container if it doesn't exist
     let container = document.getElementById('notification-container');